@@ -0,0 +1,118 @@
+"""
+Archival job for terminal reservations.
+
+EXPIRED and CANCELLED rows are dead weight on the hot path: every one of them
+still sits in the `reservations` seat/user indexes. This job moves them into
+`reservations_archive` (range-partitioned by show date) in small batches so the
+working set of `reservations` stays proportional to the active holds and sales.
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+
+# lock a batch of terminal rows; SKIP LOCKED lets several archivers run side by side.
+# Months are taken in UTC so partition bounds don't depend on the session time zone.
+SELECT_BATCH_SQL = text("""
+    SELECT r.id, date_trunc('month', sh.starts_at AT TIME ZONE 'UTC') AS month
+    FROM reservations r
+    JOIN seats s ON s.id = r.seat_id
+    JOIN shows sh ON sh.id = s.show_id
+    WHERE r.status IN ('EXPIRED', 'CANCELLED')
+      AND r.updated_at <= now() - :grace
+    ORDER BY r.id
+    LIMIT :batch_size
+    FOR UPDATE OF r SKIP LOCKED
+""")
+
+# delete from the hot table and insert into the archive in a single statement
+MOVE_BATCH_SQL = text("""
+    WITH moved AS (
+        DELETE FROM reservations r
+        USING seats s, shows sh
+        WHERE r.id = ANY(:ids)
+          AND s.id = r.seat_id
+          AND sh.id = s.show_id
+        RETURNING r.id, r.user_id, r.seat_id, s.show_id, sh.starts_at,
+                  r.status, r.hold_expiry, r.created_at, r.updated_at
+    )
+    INSERT INTO reservations_archive
+        (id, user_id, seat_id, show_id, show_starts_at, status, hold_expiry, created_at, updated_at)
+    SELECT id, user_id, seat_id, show_id, starts_at, status, hold_expiry, created_at, updated_at
+    FROM moved
+""")
+
+
+def archive_partition_name(month_start: datetime) -> str:
+    return f"reservations_archive_p{month_start:%Y%m}"
+
+
+def archive_partition_bounds(month_start: datetime):
+    """[start, end) of the UTC calendar month starting at `month_start` (a naive UTC datetime)."""
+    month_start = month_start.replace(tzinfo=timezone.utc)
+    if month_start.month == 12:
+        month_end = month_start.replace(year=month_start.year + 1, month=1)
+    else:
+        month_end = month_start.replace(month=month_start.month + 1)
+    return month_start, month_end
+
+
+def ensure_archive_partition(db, month_start: datetime):
+    """Create the monthly archive partition covering `month_start` (UTC) if it is missing."""
+    month_start, month_end = archive_partition_bounds(month_start)
+
+    # bounds carry an explicit +00:00 offset, so they are the same instants in every session time zone
+    db.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {archive_partition_name(month_start)} "
+        f"PARTITION OF reservations_archive "
+        f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{month_end.isoformat()}')"
+    ))
+
+
+def archive_terminal_reservations(db, batch_size: int = 1000, older_than: timedelta = timedelta(hours=1), max_batches: int | None = None):
+    """
+    Move terminal reservations into the archive, committing after each batch.
+    Only rows that have been terminal for at least `older_than` are moved.
+    Returns the number of archived rows.
+    """
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = db.execute(SELECT_BATCH_SQL, {"grace": older_than, "batch_size": batch_size}).all()
+        if not rows:
+            break
+
+        for month in {row.month for row in rows}:
+            ensure_archive_partition(db, month)
+
+        result = db.execute(MOVE_BATCH_SQL, {"ids": [row.id for row in rows]})
+        db.commit()
+
+        archived += result.rowcount
+        batches += 1
+        if len(rows) < batch_size:
+            break
+
+    return archived
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive EXPIRED/CANCELLED reservations")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--older-than-minutes", type=int, default=60)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = archive_terminal_reservations(
+            db,
+            batch_size=args.batch_size,
+            older_than=timedelta(minutes=args.older_than_minutes),
+            max_batches=args.max_batches,
+        )
+    finally:
+        db.close()
+    print(f"Archived {count} reservations")
@@ -11,6 +11,8 @@ from app.models import User
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
+# same scheme for endpoints that also serve anonymous callers
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login", auto_error=False)
 
 def verify_password(plain : str, hashed: str):
     return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
@@ -29,6 +31,16 @@ def decode_token(token: str):
     except JWTError:
         raise HTTPException(status_code=401, detail = "Invalid token", headers ={"WWW-Authenticate": "Bearer"})
 
+def user_id_from_token(token: str | None):
+    """Best-effort user id from a bearer token, without a DB lookup; None if absent or invalid."""
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        return int(payload["sub"])
+    except (JWTError, KeyError, TypeError, ValueError):
+        return None
+
 def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get_db)):
     credentials_error = HTTPException(
         status_code = 401,
@@ -48,4 +60,20 @@ def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get_db)):
         raise credentials_error
     return user
 
+def get_current_user_id(token: str = Depends(oauth2_scheme)):
+    """Authenticated user id from the token alone; read-only endpoints use it to avoid a primary lookup."""
+    user_id = user_id_from_token(token)
+    if user_id is None:
+        raise HTTPException(
+            status_code = 401,
+            detail = "Could not validate credentials",
+            headers ={"WWW-Authenticate": "Bearer"}
+        )
+    return user_id
+
+def get_admin_user(current_user: User = Depends(get_current_user)):
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
 
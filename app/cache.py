@@ -0,0 +1,69 @@
+"""
+Small in-process caches for hot read endpoints.
+
+Entries are grouped into namespaces (e.g. one per user). Invalidating a
+namespace bumps its version instead of scanning for keys, so it is O(1);
+orphaned entries age out through the TTL.
+"""
+import threading
+import time
+
+from app.config import cached_on_settings, settings
+
+
+class TTLCache:
+    def __init__(self, ttl_seconds: float, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace, key):
+        with self._lock:
+            cache_key = (namespace, self._versions.get(namespace, 0), key)
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[cache_key]
+                return None
+            return value
+
+    def set(self, namespace, key, value):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            cache_key = (namespace, self._versions.get(namespace, 0), key)
+            self._entries[cache_key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def invalidate(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def _evict(self):
+        # drop expired entries first, then the oldest tenth if still full
+        now = time.monotonic()
+        for cache_key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[cache_key]
+        if len(self._entries) >= self.max_entries:
+            for cache_key in list(self._entries)[: max(1, self.max_entries // 10)]:
+                del self._entries[cache_key]
+
+
+# per-user "my tickets" pages, invalidated whenever one of the user's reservations changes
+@cached_on_settings
+def get_history_cache():
+    return TTLCache(ttl_seconds=settings.HISTORY_CACHE_TTL_SECONDS)
+
+
+# catalog listing pages, short-lived since browsing traffic tolerates slightly stale counts
+@cached_on_settings
+def get_catalog_cache():
+    return TTLCache(ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS)
@@ -1,3 +1,6 @@
+import functools
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,8 +8,96 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     DATABASE_URL: str | None = None
+    HISTORY_CACHE_TTL_SECONDS: float = 5.0
+    CATALOG_CACHE_TTL_SECONDS: float = 2.0
+
+    # accounts allowed to use /admin endpoints, e.g. ADMIN_EMAILS='["ops@example.com"]'
+    ADMIN_EMAILS: list[str] = []
+
+    # read replica for read-only endpoints; unset means everything reads the primary
+    # the replica role needs pg_monitor (or pg_read_all_stats) for the lag probe; see app/replica.py
+    DATABASE_REPLICA_URL: str | None = None
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 1.0
+    READ_YOUR_WRITES_SECONDS: float = 10.0
+
+    # node-local shared seat-state table (see app/seatmap.py)
+    SEATMAP_ENABLED: bool = False
+    SEATMAP_DIR: str = "/dev/shm"
+    SEATMAP_NAMESPACE: str = "eventforge"
+    SEATMAP_SPARE_SLOTS: int = 256
+    SEATMAP_MAX_AGE_SECONDS: float = 5.0
+
+    # primary connection pool
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+
+    # startup warm-up (see app/warmup.py); readiness is reported once it finishes
+    WARMUP_POOL_CONNECTIONS: int = 5
+    WARMUP_SHOW_WINDOW_HOURS: float = 24.0
+    WARMUP_MAX_SHOWS: int = 50
+    WARMUP_RETRY_SECONDS: float = 1.0  # first backoff after a failed warm-up; doubles up to a minute
+
+    # backing store for show/seat/reservation endpoints: "memory" keeps them in-process (dev only;
+    # endpoints that read reservation data from Postgres answer 501, see app.store.require_sql_store)
+    RESERVATION_STORE: Literal["sql", "memory"] = "sql"
+
+    # per-seat coalescing of concurrent holds (see app/singleflight.py)
+    HOT_SEAT_MODE: Literal["off", "process", "advisory"] = "process"
+    HOT_SEAT_TAKEN_TTL_SECONDS: float = 1.0
+    HOT_SEAT_WAIT_SECONDS: float = 0.5
 
     class Config:
         env_file = "app/.env"
 
-settings = Settings() 
\ No newline at end of file
+
+# Settings are read on first use rather than at import, so importing the app
+# stays cheap and create_app() can supply its own instance.
+_settings = None
+_dependents = []
+
+
+def get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def configure_settings(new_settings: Settings):
+    """Install `new_settings` and drop everything that was built from the previous ones."""
+    global _settings
+    for dependent, dispose in _dependents:
+        # release what an already-built singleton holds (e.g. an engine's pooled connections)
+        if dispose is not None and dependent.cache_info().currsize:
+            previous = dependent()
+            if previous is not None:
+                dispose(previous)
+        dependent.cache_clear()
+    _settings = new_settings
+
+
+def cached_on_settings(factory=None, *, dispose=None):
+    """
+    Build a settings-derived singleton on first call; rebuilt after configure_settings().
+    `dispose(previous)`, if given, is called on the old singleton before it is dropped.
+    """
+    if factory is None:
+        return functools.partial(cached_on_settings, dispose=dispose)
+    cached = functools.lru_cache(maxsize=None)(factory)
+    _dependents.append((cached, dispose))
+    return cached
+
+
+class _LazySettings:
+    """Module-level stand-in that forwards to get_settings(), so `settings.X` keeps working."""
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_settings(), name, value)
+
+
+settings = _LazySettings()
+ 
\ No newline at end of file
@@ -1,18 +1,37 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+from app.config import cached_on_settings, settings
 
-DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Create the SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+def database_url():
+    # read .env here rather than at import; alembic only needs the URL, not the full Settings
+    load_dotenv()
+    return os.getenv("DATABASE_URL")
 
-# Create a Session instance
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Create the SQLAlchemy engine on first use; no connection is opened until a session needs one
+@cached_on_settings(dispose=Engine.dispose)
+def get_engine():
+    return create_engine(
+        settings.DATABASE_URL or database_url(),
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    )
+
+
+@cached_on_settings
+def get_sessionmaker():
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+# Create a Session instance (kept as a callable under the old name for scripts and jobs)
+def SessionLocal(**kwargs):
+    return get_sessionmaker()(**kwargs)
 
 # Create a base class for class definitions
 Base = declarative_base()
@@ -27,4 +46,4 @@ def get_db():
 
 
 if __name__ == "__main__":
-    print(f"Working here: {DATABASE_URL}")
+    print(f"Working here: {database_url()}")
@@ -0,0 +1,84 @@
+"""
+Expiry sweep for stale holds.
+
+Holds past `hold_expiry` keep blocking their seat (via the partial unique
+index) until they are flipped to EXPIRED. Confirm does this lazily; this job
+does it in bulk and, in the same transaction, releases the matching
+`show_inventory` held counts and writes EXPIRED outbox events.
+"""
+import argparse
+from collections import Counter
+
+from sqlalchemy import insert, text
+
+from app.database import SessionLocal
+from app.inventory import adjust_inventory
+from app.models import ReservationEvent
+from app.seatmap import get_seatmap
+from app.singleflight import get_seat_gate
+
+EXPIRE_BATCH_SQL = text("""
+    UPDATE reservations r
+    SET status = 'EXPIRED', updated_at = now()
+    FROM seats s
+    WHERE r.id IN (
+        SELECT id FROM reservations
+        WHERE status = 'HELD' AND hold_expiry <= now()
+        ORDER BY id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    AND s.id = r.seat_id
+    RETURNING r.id, r.user_id, r.seat_id, s.show_id, s.ordinal, s.seat_number
+""")
+
+
+def expire_stale_holds(db, batch_size: int = 1000, max_batches: int | None = None):
+    """Flip expired HELD reservations to EXPIRED, committing per batch. Returns the expired rows."""
+    expired = []
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = db.execute(EXPIRE_BATCH_SQL, {"batch_size": batch_size}).all()
+        if not rows:
+            break
+
+        db.execute(insert(ReservationEvent), [
+            {"reservation_id": row.id, "user_id": row.user_id, "seat_id": row.seat_id, "show_id": row.show_id, "event_type": "EXPIRED"}
+            for row in rows
+        ])
+
+        # adjust counters in show_id order so concurrent sweeps lock rows consistently
+        per_show = Counter(row.show_id for row in rows)
+        for show_id in sorted(per_show):
+            adjust_inventory(db, show_id, held=-per_show[show_id])
+        db.commit()
+
+        seatmap = get_seatmap()
+        if seatmap is not None:
+            for show_id in per_show:
+                seatmap.set_status(show_id, {row.ordinal: "AVAILABLE" for row in rows if row.show_id == show_id})
+        gate = get_seat_gate()
+        if gate is not None:
+            for row in rows:
+                gate.forget((row.show_id, row.seat_number))
+
+        expired.extend(rows)
+        batches += 1
+        if len(rows) < batch_size:
+            break
+
+    return expired
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expire stale HELD reservations")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        expired = expire_stale_holds(db, batch_size=args.batch_size, max_batches=args.max_batches)
+    finally:
+        db.close()
+    print(f"Expired {len(expired)} holds")
@@ -0,0 +1,99 @@
+"""
+Per-show seat counters.
+
+`show_inventory` holds total/held/confirmed counts for each show so catalog
+and availability summaries never have to COUNT over seats and reservations.
+Counters are adjusted with relative UPDATEs inside the same transaction as the
+reservation change. Callers adjust them last, just before commit, so the
+counter row lock is held as briefly as possible.
+
+`reconcile_inventory` rebuilds counters from the source tables in bulk, for
+backfills and for repairing drift.
+"""
+import argparse
+
+from sqlalchemy import select, update, text
+
+from app.database import SessionLocal
+from app.models import Seat, Show, ShowInventory
+
+# recompute counters for a batch of shows; the counter rows are locked first
+RECONCILE_SQL = text("""
+    INSERT INTO show_inventory (show_id, total_seats, held_seats, confirmed_seats)
+    SELECT sh.id,
+           count(s.id),
+           count(r.id) FILTER (WHERE r.status = 'HELD'),
+           count(r.id) FILTER (WHERE r.status = 'CONFIRMED')
+    FROM shows sh
+    LEFT JOIN seats s ON s.show_id = sh.id
+    LEFT JOIN reservations r ON r.seat_id = s.id AND r.status IN ('HELD', 'CONFIRMED')
+    WHERE sh.id = ANY(:show_ids)
+    GROUP BY sh.id
+    ON CONFLICT (show_id) DO UPDATE
+    SET total_seats = EXCLUDED.total_seats,
+        held_seats = EXCLUDED.held_seats,
+        confirmed_seats = EXCLUDED.confirmed_seats,
+        updated_at = now()
+""")
+
+
+def show_id_for_seat(seat_id: int):
+    """Scalar subquery resolving a seat's show, so callers don't need an extra round trip."""
+    return select(Seat.show_id).where(Seat.id == seat_id).scalar_subquery()
+
+
+def adjust_inventory(db, show_id, total: int = 0, held: int = 0, confirmed: int = 0):
+    """Apply counter deltas for a show; `show_id` may be an id or `show_id_for_seat(...)`."""
+    db.execute(
+        update(ShowInventory)
+        .where(ShowInventory.show_id == show_id)
+        .values(
+            total_seats=ShowInventory.total_seats + total,
+            held_seats=ShowInventory.held_seats + held,
+            confirmed_seats=ShowInventory.confirmed_seats + confirmed,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reconcile_inventory(db, show_ids: list[int] | None = None, batch_size: int = 500):
+    """
+    Rebuild counters from seats/reservations, committing per batch of shows.
+    Each batch locks its counter rows before counting: in-flight holds block on
+    the counter row until we commit, then apply their delta on top of the fresh
+    count, so nothing is lost or double counted. Returns the number of shows reconciled.
+    """
+    if show_ids is None:
+        show_ids = db.scalars(select(Show.id).order_by(Show.id)).all()
+
+    for start in range(0, len(show_ids), batch_size):
+        batch = sorted(show_ids[start:start + batch_size])
+        db.execute(
+            select(ShowInventory.show_id)
+            .where(ShowInventory.show_id.in_(batch))
+            .order_by(ShowInventory.show_id)
+            .with_for_update()
+        ).all()
+        db.execute(RECONCILE_SQL, {"show_ids": batch})
+        db.commit()
+
+    return len(show_ids)
+
+
+def get_inventory(db, show_id: int):
+    """O(1) primary-key read of a show's counters."""
+    return db.get(ShowInventory, show_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild show_inventory counters")
+    parser.add_argument("--show-id", type=int, action="append", dest="show_ids")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = reconcile_inventory(db, show_ids=args.show_ids, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Reconciled inventory for {count} shows")
@@ -1,5 +1,5 @@
 from app.database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Index, CheckConstraint,text
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, func, Index, CheckConstraint,text
 from sqlalchemy.orm import relationship
 
 # Define User model
@@ -21,10 +21,27 @@ class Show(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True, nullable=False)
     venue = Column(String, nullable=False, index=True)
-    starts_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    starts_at = Column(DateTime(timezone=True), nullable=False)
 
     seats = relationship("Seat", back_populates="show", cascade="all, delete-orphan") 
 
+    __table_args__ = (
+        # keyset pagination of the catalog on (starts_at, id)
+        Index("ix_shows_starts_at_id", "starts_at", "id"),
+        # substring/prefix search on title (requires pg_trgm)
+        Index("ix_shows_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
+# Define per-show seat counters, maintained alongside reservation state changes
+class ShowInventory(Base):
+    __tablename__ = "show_inventory"
+
+    show_id = Column(Integer, ForeignKey("shows.id", ondelete="CASCADE"), primary_key=True)
+    total_seats = Column(Integer, server_default="0", nullable=False)
+    held_seats = Column(Integer, server_default="0", nullable=False)
+    confirmed_seats = Column(Integer, server_default="0", nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
 # Define Seats model
 class Seat(Base):
     __tablename__ = "seats"
@@ -32,6 +49,8 @@ class Seat(Base):
     id = Column(Integer, primary_key=True, index=True)
     seat_number = Column(String, index=True, nullable=False)
     show_id = Column(Integer, ForeignKey("shows.id", ondelete="CASCADE"), nullable=False)
+    # stable 0-based position of the seat within its show (index into the shared seat map)
+    ordinal = Column(Integer, nullable=False)
 
     show = relationship("Show", back_populates="seats")
     reservations=relationship("Reservation", back_populates="seat", cascade="all, delete-orphan")
@@ -39,6 +58,7 @@ class Seat(Base):
     # prevent duplicate labels within the show e.g  two A2 seats in the same show
     __table_args__ = (
         Index("unique_label_per_show", "show_id", "seat_number", unique=True),
+        Index("unique_ordinal_per_show", "show_id", "ordinal", unique=True),
     )
 
 
@@ -47,7 +67,7 @@ class Reservation(Base):
     __tablename__ = "reservations"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     seat_id = Column(Integer, ForeignKey("seats.id", ondelete="CASCADE"), nullable=False, index=True)
     status = Column(String, server_default="HELD", nullable=False)  # expiry logic
     hold_expiry = Column(DateTime(timezone=True), nullable=False)
@@ -60,6 +80,8 @@ class Reservation(Base):
     
 
     __table_args__ = (
+        # serves per-user lookups and keyset pagination of a user's history
+        Index("ix_reservations_user_id_id", "user_id", "id"),
         # one active reservation (HELD or CONFIRMED) per seat
         Index('unique_active_reservation_per_seat',
             'seat_id',
@@ -73,11 +95,62 @@ class Reservation(Base):
     )
 
 
+# Define archived reservations model (cold storage for EXPIRED/CANCELLED rows)
+class ReservationArchive(Base):
+    __tablename__ = "reservations_archive"
+
+    # partition key must be part of the primary key
+    id = Column(Integer, primary_key=True)
+    show_starts_at = Column(DateTime(timezone=True), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    seat_id = Column(Integer, nullable=False)
+    show_id = Column(Integer, nullable=False, index=True)
+    status = Column(String, nullable=False)
+    hold_expiry = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    # no foreign keys: archived rows outlive the users/seats they point to
+    __table_args__ = (
+        # same keyset pagination of a user's history as on the live table
+        Index("ix_reservations_archive_user_id_id", "user_id", "id"),
+        CheckConstraint(
+            "status IN ('EXPIRED', 'CANCELLED')",
+            name = "reservation_archive_status_check"
+        ),
+        {"postgresql_partition_by": "RANGE (show_starts_at)"},
+    )
 
 
+# Define reservation events outbox (written in the same transaction as each state change)
+class ReservationEvent(Base):
+    __tablename__ = "reservation_events"
 
+    id = Column(BigInteger, primary_key=True)
+    # gap-free stream position, assigned by the relay's sequencer once the event is committed
+    position = Column(BigInteger, unique=True)
+    reservation_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    seat_id = Column(Integer, nullable=False)
+    show_id = Column(Integer, nullable=False)
+    event_type = Column(String, nullable=False)
+    hold_expiry = Column(DateTime(timezone=True))
+    occurred_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    __table_args__ = (
+        # cheap lookup of events still waiting for a position
+        Index("ix_reservation_events_unsequenced", "id", postgresql_where=text("position IS NULL")),
+        CheckConstraint(
+            "event_type IN ('HELD', 'CONFIRMED', 'EXPIRED', 'CANCELLED')",
+            name = "reservation_event_type_check"
+        ),
+    )
 
+# Define per-consumer offsets into the reservation event stream
+class OutboxOffset(Base):
+    __tablename__ = "outbox_offsets"
 
-    
+    consumer = Column(String, primary_key=True)
+    position = Column(BigInteger, server_default="0", nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,232 @@
+"""
+Transactional outbox for reservation state changes.
+
+Every hold/confirm/release/expiry inserts a `reservation_events` row in the
+same transaction as the change itself, so an event exists if and only if the
+change committed. Downstream systems read the events through the relay
+instead of polling `reservations`.
+
+Relaying happens in two steps:
+- the sequencer gives committed events a gap-free `position` in id order. It
+  runs under an advisory lock, so positions only ever become visible as a
+  contiguous prefix, and an event whose transaction committed late simply gets
+  a later position instead of being skipped;
+- each consumer keeps an offset in `outbox_offsets` and receives events with
+  `position > offset` in batches through a sink. The offset is advanced only
+  after the sink accepted the batch (at-least-once delivery).
+
+Events for the same reservation are written under its row lock, so they are
+always delivered in the order they happened.
+
+Once every consumer has moved past them, delivered events are pruned (when
+the relay is caught up), so the table stays as small as the slowest consumer's
+backlog. A consumer registered later starts from the oldest retained event.
+"""
+import argparse
+import logging
+import queue
+import time
+from abc import ABC, abstractmethod
+
+import orjson
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.database import SessionLocal
+from app.models import OutboxOffset, ReservationEvent
+
+logger = logging.getLogger(__name__)
+
+SEQUENCER_LOCK_ID = 720_340_001
+
+SEQUENCE_SQL = text("""
+    WITH pending AS (
+        SELECT id FROM reservation_events
+        WHERE position IS NULL
+        ORDER BY id
+        LIMIT :batch_size
+    ),
+    numbered AS (
+        SELECT id, row_number() OVER (ORDER BY id) AS rn FROM pending
+    )
+    UPDATE reservation_events e
+    SET position = (SELECT coalesce(max(position), 0) FROM reservation_events) + numbered.rn
+    FROM numbered
+    WHERE e.id = numbered.id
+""")
+
+
+# strictly below the lowest offset: the newest sequenced event is never pruned, so the
+# sequencer's max(position) keeps counting up instead of restarting
+PRUNE_SQL = text("""
+    DELETE FROM reservation_events
+    WHERE id IN (
+        SELECT id FROM reservation_events
+        WHERE position < (SELECT min(position) FROM outbox_offsets)
+        ORDER BY position
+        LIMIT :batch_size
+    )
+""")
+
+
+def record_event(db, event_type: str, reservation_id: int, user_id: int, seat_id: int, show_id, hold_expiry=None):
+    """Add an outbox row to the current transaction; `show_id` may be an id or a scalar subquery."""
+    db.execute(
+        insert(ReservationEvent).values(
+            reservation_id=reservation_id,
+            user_id=user_id,
+            seat_id=seat_id,
+            show_id=show_id,
+            event_type=event_type,
+            hold_expiry=hold_expiry,
+        )
+    )
+
+
+def sequence_events(db, batch_size: int = 10_000):
+    """Assign positions to committed, unsequenced events; returns how many were sequenced."""
+    if not db.scalar(text("SELECT pg_try_advisory_xact_lock(:lock_id)"), {"lock_id": SEQUENCER_LOCK_ID}):
+        db.rollback()
+        return 0  # another relay is sequencing right now
+    result = db.execute(SEQUENCE_SQL, {"batch_size": batch_size})
+    db.commit()
+    return result.rowcount
+
+
+def relay_batch(db, sink, consumer: str, batch_size: int = 1000):
+    """Deliver the next batch after `consumer`'s offset to `sink`; returns the number of events delivered."""
+    db.execute(pg_insert(OutboxOffset).values(consumer=consumer).on_conflict_do_nothing())
+    # lock the offset so one relay at a time serves a consumer
+    offset = db.scalar(select(OutboxOffset.position).where(OutboxOffset.consumer == consumer).with_for_update())
+
+    events = db.execute(
+        select(ReservationEvent)
+        .where(ReservationEvent.position > offset)
+        .order_by(ReservationEvent.position)
+        .limit(batch_size)
+    ).scalars().all()
+    if not events:
+        db.commit()
+        return 0
+
+    sink.publish([event_to_dict(event) for event in events])
+    db.execute(
+        update(OutboxOffset)
+        .where(OutboxOffset.consumer == consumer)
+        .values(position=events[-1].position)
+    )
+    db.commit()
+    return len(events)
+
+
+def prune_delivered(db, batch_size: int = 10_000):
+    """Delete events every consumer has received, in batches; returns how many were deleted."""
+    deleted = 0
+    while True:
+        result = db.execute(PRUNE_SQL, {"batch_size": batch_size})
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+def event_to_dict(event):
+    return {
+        "position": event.position,
+        "id": event.id,
+        "event_type": event.event_type,
+        "reservation_id": event.reservation_id,
+        "user_id": event.user_id,
+        "seat_id": event.seat_id,
+        "show_id": event.show_id,
+        "hold_expiry": event.hold_expiry,
+        "occurred_at": event.occurred_at,
+    }
+
+
+class OutboxSink(ABC):
+    @abstractmethod
+    def publish(self, events: list[dict]):
+        """Deliver a batch in order; raise to leave the consumer offset where it was."""
+
+
+class NDJSONFileSink(OutboxSink):
+    """Appends one JSON document per event to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def publish(self, events):
+        payload = b"".join(orjson.dumps(event, option=orjson.OPT_UTC_Z) + b"\n" for event in events)
+        with open(self.path, "ab") as f:
+            f.write(payload)
+
+
+class WebhookSink(OutboxSink):
+    """POSTs each batch as a JSON array; any non-2xx response fails the batch."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        import httpx  # only the relay process needs an HTTP client
+
+        self.url = url
+        self.client = httpx.Client(timeout=timeout)
+
+    def publish(self, events):
+        response = self.client.post(
+            self.url,
+            content=orjson.dumps(events, option=orjson.OPT_UTC_Z),
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+
+
+class QueueSink(OutboxSink):
+    """Hands batches to an in-process queue (tests, or a worker thread feeding a broker)."""
+
+    def __init__(self, target: queue.Queue | None = None):
+        self.queue = target if target is not None else queue.Queue()
+
+    def publish(self, events):
+        self.queue.put(events)
+
+
+def run_relay(sink, consumer: str, batch_size: int = 1000, interval: float = 1.0, once: bool = False):
+    """Sequence and relay until caught up, then poll every `interval` seconds."""
+    db = SessionLocal()
+    try:
+        while True:
+            sequence_events(db)
+            delivered = relay_batch(db, sink, consumer, batch_size=batch_size)
+            if delivered:
+                logger.info("Relayed %d events to %s", delivered, consumer)
+                continue
+            pruned = prune_delivered(db)
+            if pruned:
+                logger.info("Pruned %d delivered events", pruned)
+            if once:
+                return
+            time.sleep(interval)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relay reservation events to a sink")
+    parser.add_argument("--consumer", required=True)
+    parser.add_argument("--sink", choices=["ndjson", "webhook"], default="ndjson")
+    parser.add_argument("--path", default="reservation_events.ndjson")
+    parser.add_argument("--url")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--once", action="store_true", help="exit once caught up")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.sink == "webhook":
+        if not args.url:
+            parser.error("--url is required for the webhook sink")
+        sink = WebhookSink(args.url)
+    else:
+        sink = NDJSONFileSink(args.path)
+
+    run_relay(sink, args.consumer, batch_size=args.batch_size, interval=args.interval, once=args.once)
@@ -0,0 +1,149 @@
+"""
+Read-replica routing for read-only endpoints.
+
+`get_read_db` hands out a session on the replica when one is configured and
+fresh enough, and falls back to the primary otherwise:
+- replica lag is checked at most every REPLICA_LAG_CHECK_INTERVAL_SECONDS and
+  the replica is skipped while it is more than REPLICA_MAX_LAG_SECONDS behind
+  (or unreachable);
+- a user who just changed a reservation reads the primary for
+  READ_YOUR_WRITES_SECONDS so they always see their own hold.
+
+Recent writers are tracked per process. Behind several workers a follow-up read
+can land on a worker that did not see the write and be served by the replica,
+so READ_YOUR_WRITES_SECONDS should stay above REPLICA_MAX_LAG_SECONDS.
+"""
+import logging
+import threading
+import time
+
+from fastapi import Depends
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import optional_oauth2_scheme, user_id_from_token
+from app.config import cached_on_settings, settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# lag is 0 when the replica has replayed everything it received, even if the primary is idle.
+# That only holds while WAL is actually streaming in: a replica whose receiver stopped has
+# replayed everything too, so it reports NULL (stale) instead. Reading the receiver status
+# needs pg_read_all_stats (e.g. via pg_monitor); without it the replica is never used.
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+CAN_READ_STATS_SQL = text("SELECT pg_has_role('pg_read_all_stats', 'USAGE')")
+
+
+class ReplicaRouter:
+    def __init__(self, max_lag_seconds: float, check_interval_seconds: float, read_your_writes_seconds: float):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._fresh = False
+        self._warned_no_lag = False
+        self._recent_writers = {}  # user_id -> monotonic time until which reads go to the primary
+
+    def note_write(self, user_id: int):
+        with self._lock:
+            self._recent_writers[user_id] = time.monotonic() + self.read_your_writes_seconds
+
+    def must_read_primary(self, user_id: int | None):
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._recent_writers.get(user_id)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._recent_writers[user_id]
+                return False
+            return True
+
+    def replica_is_fresh(self, session):
+        """Cached staleness check; any error marks the replica stale until the next check."""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval_seconds:
+                return self._fresh
+
+        try:
+            lag = session.scalar(REPLICA_LAG_SQL)
+            fresh = lag is not None and lag <= self.max_lag_seconds
+            if lag is None:
+                self._warn_no_lag(session)
+        except DBAPIError:
+            fresh = False
+
+        with self._lock:
+            self._checked_at = now
+            self._fresh = fresh
+        return fresh
+
+
+    def _warn_no_lag(self, session):
+        # once per router (i.e. per replica engine); otherwise reads would quietly stay on the primary
+        with self._lock:
+            if self._warned_no_lag:
+                return
+            self._warned_no_lag = True
+        if not session.scalar(CAN_READ_STATS_SQL):
+            logger.warning(
+                "Replica lag probe returned NULL: the replica role cannot read pg_stat_wal_receiver; "
+                "grant it pg_monitor (or pg_read_all_stats). Reads use the primary until then."
+            )
+        else:
+            logger.warning("Replica lag probe returned NULL: WAL receiver is not streaming. Reads use the primary.")
+
+
+@cached_on_settings
+def get_replica_router():
+    return ReplicaRouter(
+        max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+        check_interval_seconds=settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+        read_your_writes_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    )
+
+
+def _dispose_bind(maker):
+    maker.kw["bind"].dispose()
+
+
+# None when no replica is configured
+@cached_on_settings(dispose=_dispose_bind)
+def get_replica_sessionmaker():
+    if not settings.DATABASE_REPLICA_URL:
+        return None
+    replica_engine = create_engine(settings.DATABASE_REPLICA_URL, pool_pre_ping=True)
+    return sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+
+def open_read_session(user_id: int | None = None):
+    """Session on the replica if it is usable for this user, otherwise on the primary."""
+    replica_sessionmaker = get_replica_sessionmaker()
+    replica_router = get_replica_router()
+    if replica_sessionmaker is not None and not replica_router.must_read_primary(user_id):
+        db = replica_sessionmaker()
+        if replica_router.replica_is_fresh(db):
+            return db
+        db.close()
+    return SessionLocal()
+
+
+# Dependency for read-only endpoints
+def get_read_db(token: str | None = Depends(optional_oauth2_scheme)):
+    db = open_read_session(user_id_from_token(token))
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,28 @@
+"""
+Fast-path JSON responses for high-volume list endpoints.
+
+Endpoints using these return plain dicts/lists built from column tuples and
+encode them with orjson directly, skipping per-row pydantic validation. The
+endpoint's `response_model` only documents the layouts: the row list or, for
+`format=columnar`, the matching `*ColumnsOut` model.
+"""
+import orjson
+from fastapi.responses import Response
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def to_columnar(rows: list[dict], columns: tuple[str, ...]):
+    """Rows -> parallel arrays, e.g. {"seat_id": [...], "seat_number": [...], ...}."""
+    return {column: [row[column] for row in rows] for column in columns}
+
+
+def list_response(rows: list[dict], columns: tuple[str, ...], format: str = "rows"):
+    if format == "columnar":
+        return FastJSONResponse(to_columnar(rows, columns))
+    return FastJSONResponse(rows)
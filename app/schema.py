@@ -2,6 +2,8 @@ from pydantic import BaseModel, EmailStr, Field, conlist, conint
 from datetime import datetime
 from typing import Literal
 
+ReservationStatus = Literal["HELD", "CONFIRMED", "EXPIRED", "CANCELLED"]
+
 # User Schemas
 class UserCreate(BaseModel):
     name: str
@@ -39,8 +41,35 @@ class ShowOut(BaseModel):
     venue: str
     starts_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = {
+        "from_attributes": True
+    }
+
+class ShowCatalogItem(BaseModel):
+    id: int
+    title: str
+    venue: str
+    starts_at: datetime
+    total_seats: int
+    available_seats: int
+    held_seats: int
+    confirmed_seats: int
+
+    model_config = {
+        "from_attributes": True
+    }
+
+class ShowCatalogPage(BaseModel):
+    items: list[ShowCatalogItem]
+    next_cursor: str | None = None
+
+class ShowInventoryOut(BaseModel):
+    show_id: int
+    total_seats: int
+    held_seats: int
+    confirmed_seats: int
+    available_seats: int
+    sold_out: bool
 
 # Seat Schemas
 class SeatCreateBulk(BaseModel):
@@ -50,14 +79,15 @@ class SeatOut(BaseModel):
     id: int
     show_id: int
     seat_number: str
-    
-    class Config:
-        orm_mode = True
+
+    model_config = {
+        "from_attributes": True
+    }
 
 class SeatAvailabilityOut(BaseModel):
-    seat_id: str
+    seat_id: int
     seat_number: str
-    status: Literal["AVAILABLE", "HELD", "RESERVED"]
+    status: Literal["AVAILABLE", "HELD", "CONFIRMED"]
     hold_expiry: datetime | None = None
 
     model_config = {
@@ -65,6 +95,22 @@ class SeatAvailabilityOut(BaseModel):
     }
 
 
+# row layout for list endpoints; "columnar" returns parallel arrays keyed by column
+# format=columnar: the same fields as parallel arrays, one entry per seat
+class SeatColumnsOut(BaseModel):
+    id: list[int]
+    show_id: list[int]
+    seat_number: list[str]
+
+class SeatAvailabilityColumnsOut(BaseModel):
+    seat_id: list[int]
+    seat_number: list[str]
+    status: list[Literal["AVAILABLE", "HELD", "CONFIRMED"]]
+    hold_expiry: list[datetime | None]
+
+ListFormat = Literal["rows", "columnar"]
+ExportFormat = Literal["csv", "ndjson"]
+
 # Reservation Schemas
 class ReservationCreate(BaseModel):
     seat_number: str
@@ -75,7 +121,7 @@ class ReservationOut(BaseModel):
     id: int
     user_id: int
     seat_id: int
-    status: Literal["HELD", "CONFIRMED", "EXPIRED", "CANCELLED"]
+    status: ReservationStatus
     hold_expiry: datetime
     created_at: datetime
     updated_at: datetime
@@ -84,3 +130,23 @@ class ReservationOut(BaseModel):
         "from_attributes": True
     }
 
+# "My tickets" read model: reservation joined with its seat and show
+class ReservationHistoryItem(BaseModel):
+    id: int
+    status: ReservationStatus
+    hold_expiry: datetime
+    created_at: datetime
+    seat_id: int
+    seat_number: str | None = None  # None once an archived reservation's seat or show was deleted
+    show_id: int
+    show_title: str | None = None
+    show_starts_at: datetime
+
+    model_config = {
+        "from_attributes": True
+    }
+
+class ReservationHistoryPage(BaseModel):
+    items: list[ReservationHistoryItem]
+    next_cursor: int | None = None  # pass as before_id to fetch the next page
+
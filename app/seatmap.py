@@ -0,0 +1,443 @@
+"""
+Node-local seat state shared by all worker processes.
+
+Each show gets an mmap'd file (under SEATMAP_DIR, /dev/shm by default) laid
+out as a fixed header, one status byte per seat ordinal and then, 8-byte
+aligned, each seat's hold expiry (native u64 microseconds since the epoch, 0
+when the seat is not HELD):
+
+    generation (u64) | loaded_at_ms (u64) | capacity (u32) | seat_count (u32) | retired (u8) | padding
+    | status bytes... | padding | hold expiries...
+
+Writers serialize on an flock of the file and bump `generation` to an odd
+value before touching the status bytes and to the next even value after
+(a seqlock); readers retry when they see an odd or changed generation, so a
+torn read is detected rather than returned. A generation of 0 means the table
+has not been loaded yet.
+
+The process that changes a reservation updates the byte after committing.
+Tables older than SEATMAP_MAX_AGE_SECONDS are rebuilt from the database, which
+bounds how stale a byte can get when the change happened on another node or in
+a process that died before updating it. Only primary sessions load or rebuild
+a table; stores on a replica session read tables that are already fresh and
+otherwise fall back to their own query. UNKNOWN (or anything this node cannot
+answer) always falls back to the database, and a seat the table reports as
+taken is only refused once Postgres confirms it.
+
+A table that runs out of slots is rebuilt into a bigger file that atomically
+replaces the old one; the old file is marked retired so processes still
+mapping it reopen the path. `python -m app.seatmap` (also run on warm-up)
+removes the files of shows that were deleted or have already started.
+"""
+import argparse
+import fcntl
+from array import array
+from datetime import datetime, timedelta, timezone
+import mmap
+import os
+import struct
+import threading
+import time
+import weakref
+
+from sqlalchemy import and_, func, select
+
+from app.config import cached_on_settings, settings
+from app.database import SessionLocal
+from app.models import Reservation, Seat, Show
+
+UNKNOWN, AVAILABLE, HELD, CONFIRMED = 0, 1, 2, 3
+STATUS_CODES = {"AVAILABLE": AVAILABLE, "HELD": HELD, "CONFIRMED": CONFIRMED}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+HEADER = struct.Struct("<QQII")
+HEADER_SIZE = 32
+RETIRED_OFFSET = HEADER.size
+READ_RETRIES = 16
+EXPIRY = struct.Struct("=Q")  # node-local file, so native byte order
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _expiry_offset(capacity: int):
+    return HEADER_SIZE + (capacity + 7) // 8 * 8
+
+
+def _file_size(capacity: int):
+    return _expiry_offset(capacity) + EXPIRY.size * capacity
+
+
+def to_micros(moment: datetime | None):
+    return 0 if moment is None else (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros: int):
+    return EPOCH + timedelta(microseconds=micros)
+
+
+class SeatStateTable:
+    """One show's status bytes and hold expiries in a shared, file-backed mmap."""
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        # flock only excludes other open files, so threads of this process also share a mutex
+        self._thread_lock = threading.Lock()
+        with self.locked():
+            size = os.fstat(self._fd).st_size
+            existing_capacity = HEADER.unpack(os.pread(self._fd, HEADER.size, 0))[2] if size >= HEADER_SIZE else None
+            if existing_capacity is not None and size == _file_size(existing_capacity):
+                # attach to a table another process created, whatever its capacity
+                self._mm = mmap.mmap(self._fd, size)
+            else:
+                # new file (or one left by an older layout): start unloaded
+                os.ftruncate(self._fd, _file_size(capacity))
+                self._mm = mmap.mmap(self._fd, _file_size(capacity))
+                self._mm[:HEADER_SIZE] = bytes(HEADER_SIZE)
+                HEADER.pack_into(self._mm, 0, 0, 0, capacity, 0)
+        self.capacity = HEADER.unpack_from(self._mm, 0)[2]
+        self._expiries_at = _expiry_offset(self.capacity)
+        # a replaced table may still be in use by other threads; close it once it is dropped
+        self._closer = weakref.finalize(self, _close, self._mm, self._fd)
+
+    def locked(self):
+        return _FileLock(self)
+
+    @property
+    def generation(self):
+        return HEADER.unpack_from(self._mm, 0)[0]
+
+    @property
+    def loaded_at(self):
+        return HEADER.unpack_from(self._mm, 0)[1] / 1000
+
+    @property
+    def seat_count(self):
+        return HEADER.unpack_from(self._mm, 0)[3]
+
+    @property
+    def retired(self):
+        return self._mm[RETIRED_OFFSET] == 1
+
+    def retire(self):
+        """Mark the file as replaced or removed; the caller must hold `locked()`."""
+        self._mm[RETIRED_OFFSET] = 1
+
+    def _begin_write(self):
+        generation = self.generation
+        struct.pack_into("<Q", self._mm, 0, generation | 1)
+        return generation
+
+    def _end_write(self, generation, loaded_at_ms=None, seat_count=None):
+        # next even generation; a never-loaded table (0) becomes 2
+        _, current_loaded_at_ms, _, current_seat_count = HEADER.unpack_from(self._mm, 0)
+        HEADER.pack_into(
+            self._mm, 0,
+            (generation | 1) + 1,
+            current_loaded_at_ms if loaded_at_ms is None else loaded_at_ms,
+            self.capacity,
+            current_seat_count if seat_count is None else seat_count,
+        )
+
+    def load(self, statuses: bytes, expiries: array | None = None):
+        """Replace the whole table (`expiries`: u64 microseconds per ordinal); the caller must hold `locked()`."""
+        generation = self._begin_write()
+        stored = statuses[:self.capacity]
+        self._mm[HEADER_SIZE:HEADER_SIZE + self.capacity] = stored + bytes(self.capacity - len(stored))
+        stored_expiries = array("Q", (expiries or array("Q"))[:self.capacity])
+        stored_expiries.extend([0] * (self.capacity - len(stored_expiries)))
+        self._mm[self._expiries_at:self._expiries_at + EXPIRY.size * self.capacity] = stored_expiries.tobytes()
+        self._end_write(generation, loaded_at_ms=int(time.time() * 1000), seat_count=len(statuses))
+
+    def set(self, updates: dict[int, int], seat_count: int | None = None, expiries: dict[int, int] | None = None):
+        """
+        Set status bytes by ordinal (and grow `seat_count` for new seats); ordinals beyond capacity stay UNKNOWN.
+        `expiries` gives the hold expiry (u64 microseconds) of updated HELD seats; other seats get 0.
+        Returns False if the table was retired and the update belongs in the file now at `path`.
+        """
+        with self.locked():
+            if self.retired:
+                return False
+            if self.generation == 0:
+                return True
+            generation = self._begin_write()
+            for ordinal, status in updates.items():
+                if 0 <= ordinal < self.capacity:
+                    self._mm[HEADER_SIZE + ordinal] = status
+                    EXPIRY.pack_into(self._mm, self._expiries_at + EXPIRY.size * ordinal, (expiries or {}).get(ordinal, 0))
+            if seat_count is not None:
+                seat_count = max(seat_count, self.seat_count)
+            self._end_write(generation, seat_count=seat_count)
+        return True
+
+    def snapshot(self):
+        """Consistent (status bytes, hold expiries, seat_count), or None if not loaded / too contended."""
+        for _ in range(READ_RETRIES):
+            before = self.generation
+            if before == 0:
+                return None
+            if before & 1:
+                continue
+            data = self._mm[HEADER_SIZE:HEADER_SIZE + self.capacity]
+            expiries = array("Q", self._mm[self._expiries_at:self._expiries_at + EXPIRY.size * self.capacity])
+            seat_count = self.seat_count
+            if self.generation == before:
+                return data, expiries, seat_count
+        return None
+
+    def status(self, ordinal: int):
+        if not 0 <= ordinal < self.capacity:
+            return UNKNOWN
+        for _ in range(READ_RETRIES):
+            before = self.generation
+            if before == 0:
+                return UNKNOWN
+            if before & 1:
+                continue
+            value = self._mm[HEADER_SIZE + ordinal]
+            if self.generation == before:
+                return value
+        return UNKNOWN
+
+    def close(self):
+        self._closer()
+
+
+def _close(mm, fd):
+    mm.close()
+    os.close(fd)
+
+
+class _FileLock:
+    def __init__(self, table):
+        self.table = table  # keeps the table (and its fd) alive while locked
+
+    def __enter__(self):
+        self.table._thread_lock.acquire()
+        fcntl.flock(self.table._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.table._fd, fcntl.LOCK_UN)
+        self.table._thread_lock.release()
+
+
+class SeatDirectory:
+    """Per-process, append-only map between seat ordinals, ids and labels for one show."""
+
+    def __init__(self, rows):
+        self.seat_ids = []
+        self.labels = []
+        self.ordinals_by_label = {}
+        self.ordinals_by_seat_id = {}
+        for seat_id, label, ordinal in rows:
+            # ordinals are dense from 0, so list positions line up with them
+            self.seat_ids.append(seat_id)
+            self.labels.append(label)
+            self.ordinals_by_label[label] = ordinal
+            self.ordinals_by_seat_id[seat_id] = ordinal
+
+
+class SeatMap:
+    def __init__(self, directory: str, namespace: str, spare_slots: int = 256, max_age_seconds: float = 5.0):
+        self.directory = directory
+        self.namespace = namespace
+        self.spare_slots = spare_slots
+        self.max_age_seconds = max_age_seconds
+        self._tables = {}
+        self._directories = {}
+        self._lock = threading.Lock()
+
+    def _path(self, show_id: int):
+        return os.path.join(self.directory, f"{self.namespace}_seatmap_{show_id}")
+
+    def seat_directory(self, db, show_id: int, refresh: bool = False):
+        with self._lock:
+            directory = self._directories.get(show_id)
+        if directory is None or refresh:
+            rows = db.execute(
+                select(Seat.id, Seat.seat_number, Seat.ordinal).where(Seat.show_id == show_id).order_by(Seat.ordinal)
+            ).all()
+            directory = SeatDirectory(rows)
+            with self._lock:
+                self._directories[show_id] = directory
+        return directory
+
+    def _open_table(self, show_id: int, capacity: int = 0):
+        with self._lock:
+            table = self._tables.get(show_id)
+            if table is not None and table.retired:
+                table = None  # replaced by a bigger file (or removed); reopen the path
+            if table is None and (capacity or os.path.exists(self._path(show_id))):
+                table = SeatStateTable(self._path(show_id), capacity)
+                self._tables[show_id] = table
+            return table
+
+    def _needs_load(self, table):
+        return (
+            table.generation == 0
+            or time.time() - table.loaded_at > self.max_age_seconds
+            or table.seat_count > table.capacity
+        )
+
+    def _read_statuses(self, db, show_id: int):
+        rows = db.execute(
+            select(Seat.ordinal, Reservation.status, Reservation.hold_expiry)
+            .outerjoin(Reservation, and_(Reservation.seat_id == Seat.id, Reservation.status.in_(("HELD", "CONFIRMED"))))
+            .where(Seat.show_id == show_id)
+        ).all()
+        # at most one active reservation per seat, so one row per seat
+        statuses = bytearray(len(rows))
+        expiries = array("Q", bytes(EXPIRY.size * len(rows)))
+        for ordinal, status, hold_expiry in rows:
+            statuses[ordinal] = STATUS_CODES[status or "AVAILABLE"]
+            if status == "HELD":
+                expiries[ordinal] = to_micros(hold_expiry)
+        return bytes(statuses), expiries
+
+    def _replace_table(self, show_id: int, old, statuses: bytes, expiries: array):
+        """Load the seats into a bigger file and swap it in; the caller holds the old table's lock."""
+        path = self._path(show_id)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        table = SeatStateTable(temp_path, len(statuses) + self.spare_slots)
+        with table.locked():
+            table.load(statuses, expiries)
+        os.replace(temp_path, path)
+        table.path = path
+        old.retire()
+        with self._lock:
+            self._tables[show_id] = table
+        return table
+
+    def table(self, db, show_id: int, load: bool = True):
+        """
+        Open the show's table, loading or rebuilding it from `db` (a primary session) when needed.
+        With `load=False` nothing is written: returns the table only if it exists and is fresh.
+        """
+        directory = self.seat_directory(db, show_id)
+        while True:
+            if not load:
+                table = self._open_table(show_id)
+                return None if table is None or self._needs_load(table) else table
+
+            table = self._open_table(show_id, capacity=len(directory.seat_ids) + self.spare_slots)
+            if not self._needs_load(table):
+                return table
+            with table.locked():
+                if table.retired:
+                    continue  # another worker swapped in a bigger file while we waited
+                # re-check under the lock; another worker may have just loaded it
+                if self._needs_load(table):
+                    statuses, expiries = self._read_statuses(db, show_id)
+                    if len(statuses) > table.capacity:
+                        table = self._replace_table(show_id, table, statuses, expiries)
+                    else:
+                        table.load(statuses, expiries)
+            return table
+
+    def set_status(self, show_id: int, updates: dict[int, str], seat_count: int | None = None, hold_expiries: dict[int, datetime] | None = None):
+        """Record committed changes ({ordinal: status}, plus {ordinal: hold_expiry} for holds) if this node has a table for the show."""
+        codes = {ordinal: STATUS_CODES[status] for ordinal, status in updates.items()}
+        expiries = {ordinal: to_micros(hold_expiry) for ordinal, hold_expiry in (hold_expiries or {}).items()}
+        while True:
+            table = self._open_table(show_id)
+            if table is None or table.set(codes, seat_count=seat_count, expiries=expiries):
+                return
+
+    def cleanup(self, db):
+        """Remove the tables of shows that no longer exist or have already started; returns their ids."""
+        prefix = f"{self.namespace}_seatmap_"
+        show_ids = set()
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                show_ids.add(int(name[len(prefix):]))
+        if not show_ids:
+            return []
+
+        upcoming = set(db.scalars(select(Show.id).where(Show.id.in_(show_ids), Show.starts_at >= func.now())))
+        removed = sorted(show_ids - upcoming)
+        for show_id in removed:
+            table = self._open_table(show_id)
+            if table is None:
+                continue
+            with table.locked():
+                try:
+                    os.unlink(self._path(show_id))
+                except FileNotFoundError:
+                    pass  # another worker got there first
+                table.retire()
+            with self._lock:
+                self._tables.pop(show_id, None)
+                self._directories.pop(show_id, None)
+        return removed
+
+    def is_taken(self, db, show_id: int, seat_label: str, load: bool = True):
+        """True if this node's table has the seat HELD/CONFIRMED (possibly stale, so only a hint); False means "ask the DB"."""
+        ordinal = self.seat_directory(db, show_id).ordinals_by_label.get(seat_label)
+        if ordinal is None:
+            return False
+        table = self.table(db, show_id, load=load)
+        return table is not None and table.status(ordinal) in (HELD, CONFIRMED)
+
+    def availability(self, db, show_id: int, load: bool = True):
+        """
+        Availability rows from the shared table, or None when it cannot answer for every seat.
+        Pass `load=False` for replica sessions so they never (re)build the table from lagging data.
+        """
+        if not self.seat_directory(db, show_id).seat_ids:
+            return None  # unknown show or no seats yet; let the database answer
+        table = self.table(db, show_id, load=load)
+        if table is None:
+            return None
+        snapshot = table.snapshot()
+        if snapshot is None:
+            return None
+        data, expiries, seat_count = snapshot
+        if seat_count > table.capacity:
+            return None
+
+        # seats added by another worker since this process loaded its directory
+        directory = self.seat_directory(db, show_id)
+        if len(directory.seat_ids) < seat_count:
+            directory = self.seat_directory(db, show_id, refresh=True)
+            if len(directory.seat_ids) < seat_count:
+                return None  # a lagging replica does not have them yet
+
+        seats = []
+        for ordinal in range(seat_count):
+            status = data[ordinal]
+            if status == UNKNOWN or (status == HELD and not expiries[ordinal]):
+                return None
+            seats.append({
+                "seat_id": directory.seat_ids[ordinal],
+                "seat_number": directory.labels[ordinal],
+                "status": STATUS_NAMES[status],
+                "hold_expiry": from_micros(expiries[ordinal]) if status == HELD else None,
+            })
+        return seats
+
+
+# None unless SEATMAP_ENABLED
+@cached_on_settings
+def get_seatmap():
+    if not settings.SEATMAP_ENABLED:
+        return None
+    return SeatMap(
+        directory=settings.SEATMAP_DIR,
+        namespace=settings.SEATMAP_NAMESPACE,
+        spare_slots=settings.SEATMAP_SPARE_SLOTS,
+        max_age_seconds=settings.SEATMAP_MAX_AGE_SECONDS,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove seat map files of deleted or past shows")
+    parser.parse_args()
+
+    seatmap = get_seatmap()
+    if seatmap is None:
+        raise SystemExit("SEATMAP_ENABLED is off")
+    db = SessionLocal()
+    try:
+        removed = seatmap.cleanup(db)
+    finally:
+        db.close()
+    print(f"Removed {len(removed)} seat map tables")
@@ -1,3 +1,4 @@
+import base64
 import bcrypt
 import re
 from datetime import datetime, timedelta
@@ -26,3 +27,15 @@ def normalize_seat_labels(seat_labels):
 def calculate_hold_expiry(hold_minutes: int):
     return datetime.now(timezone.utc) + timedelta(minutes=hold_minutes)
 
+# encode/decode opaque keyset cursors for the show catalog (starts_at, id)
+def encode_show_cursor(starts_at: datetime, show_id: int):
+    raw = f"{starts_at.isoformat()}|{show_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_show_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        starts_at, show_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(starts_at), int(show_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,125 @@
+"""
+Per-seat request coalescing for holds.
+
+When a popular seat frees up, hundreds of holds for the same seat arrive at
+once. Without coalescing every one of them opens a transaction, inserts, trips
+`unique_active_reservation_per_seat` and rolls back. `SeatGate` lets one
+request per seat (the leader) go to the database while the others in this
+process wait for its outcome: if the leader got the seat, or found it taken
+through the unique index (`SeatTaken`), they get a 409 without a query; if it
+was refused with another 4xx that depends only on the seat (e.g. 404), they
+get the same answer; for anything else, including other 409s such as a missed
+advisory lock, one waiter takes over and checks again.
+
+Endpoints are sync, so a waiter blocks one threadpool thread for up to
+HOT_SEAT_WAIT_SECONDS (0.5s by default) before giving up with a 409; keep it
+well below what a burst on a single seat could tie up in the pool.
+
+In HOT_SEAT_MODE=advisory the leader additionally takes a transaction-level
+advisory lock on the seat, so leaders in other worker processes fail fast
+with 409 instead of racing on the unique index.
+
+A won (or truly taken) seat is also remembered as taken for
+HOT_SEAT_TAKEN_TTL_SECONDS (1s by default, 0 disables it) so late arrivals are
+refused without a query.
+Releases, lazy expiries and the expiry sweep in this process clear the entry;
+changes made in other processes are only picked up once it expires.
+"""
+import threading
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.config import cached_on_settings, settings
+
+SEAT_LOCK_SQL = text("SELECT pg_try_advisory_xact_lock(:show_id, hashtext(:seat_label))")
+
+
+class SeatTaken(HTTPException):
+    """409 for a seat that has an active reservation according to Postgres, not just a lost race."""
+
+    def __init__(self):
+        super().__init__(status_code=409, detail="Seat is already reserved")
+
+
+def try_lock_seat(db, show_id: int, seat_label: str):
+    """Take the cross-process seat lock for the rest of the transaction; False if another leader has it."""
+    return db.scalar(SEAT_LOCK_SQL, {"show_id": show_id, "seat_label": seat_label})
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None  # HTTPException the waiters should see, if any
+        self.taken = False
+
+
+class SeatGate:
+    def __init__(self, taken_ttl_seconds: float = 0.0, wait_seconds: float = 0.5):
+        self.taken_ttl_seconds = taken_ttl_seconds
+        self.wait_seconds = wait_seconds
+        self._flights = {}
+        self._taken = {}  # key -> monotonic time the entry expires
+        self._lock = threading.Lock()
+
+    def run(self, key, fn):
+        """Call `fn` as the only in-flight request for `key`, or share the in-flight request's outcome."""
+        while True:
+            with self._lock:
+                expires_at = self._taken.get(key)
+                if expires_at is not None:
+                    if expires_at > time.monotonic():
+                        raise HTTPException(status_code=409, detail="Seat is already reserved")
+                    del self._taken[key]
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+
+            if leader:
+                return self._lead(key, flight, fn)
+
+            if not flight.done.wait(self.wait_seconds):
+                raise HTTPException(status_code=409, detail="Seat is being reserved by another request")
+            if flight.taken:
+                raise HTTPException(status_code=409, detail="Seat is already reserved")
+            if flight.error is not None:
+                raise flight.error
+            # the leader failed for a reason that says nothing final about the seat; check again
+
+    def _lead(self, key, flight, fn):
+        try:
+            result = fn()
+            flight.taken = True
+            return result
+        except SeatTaken:
+            flight.taken = True
+            raise
+        except HTTPException as exc:
+            # other 409s (another worker's advisory lock) may clear at once; let a waiter re-check
+            if 400 <= exc.status_code < 500 and exc.status_code != 409:
+                flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.taken and self.taken_ttl_seconds > 0:
+                    self._taken[key] = time.monotonic() + self.taken_ttl_seconds
+            flight.done.set()
+
+    def forget(self, key):
+        """The seat became free in this process; stop refusing it from memory."""
+        with self._lock:
+            self._taken.pop(key, None)
+
+
+# None when HOT_SEAT_MODE=off
+@cached_on_settings
+def get_seat_gate():
+    if settings.HOT_SEAT_MODE == "off":
+        return None
+    return SeatGate(
+        taken_ttl_seconds=settings.HOT_SEAT_TAKEN_TTL_SECONDS,
+        wait_seconds=settings.HOT_SEAT_WAIT_SECONDS,
+    )
@@ -0,0 +1,525 @@
+"""
+Reservation store: the seat and reservation domain logic behind the API.
+
+`ReservationStore` is the interface the endpoints talk to. `SqlReservationStore`
+is the production implementation on top of a SQLAlchemy session (Postgres
+enforces one active reservation per seat through the partial unique index).
+`InMemoryReservationStore` enforces the same invariant with lock striping and
+is meant for local development, fast tests and benchmarks of the domain logic
+without any I/O.
+
+Stores raise HTTPException directly, the same way app.auth does, so endpoints
+stay thin and both implementations report errors identically.
+"""
+import itertools
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import and_, func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.cache import get_history_cache, get_catalog_cache
+from app.config import cached_on_settings, settings
+from app.database import get_db
+from app.inventory import adjust_inventory, show_id_for_seat
+from app.models import Reservation, Seat, Show, ShowInventory
+from app.outbox import record_event
+from app.replica import get_read_db, get_replica_router
+from app.seatmap import get_seatmap
+from app.services import calculate_hold_expiry, normalize_seat_labels
+from app.singleflight import SeatTaken, get_seat_gate, try_lock_seat
+
+ACTIVE_STATUSES = ("HELD", "CONFIRMED")
+SEAT_TAKEN_CONSTRAINT = "unique_active_reservation_per_seat"
+SEAT_COLUMNS = ("id", "show_id", "seat_number")
+AVAILABILITY_COLUMNS = ("seat_id", "seat_number", "status", "hold_expiry")
+
+
+def reservation_changed(user_id: int):
+    """Drop the user's cached history and pin their reads to the primary for a while."""
+    get_history_cache().invalidate(user_id)
+    get_replica_router().note_write(user_id)
+
+
+def normalize_seat_request(seat_labels: list[str]):
+    """Normalize labels for a bulk seat request and reject in-request duplicates."""
+    try:
+        normalized_labels = [normalize_seat_labels(s) for s in seat_labels]
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=str(ve))
+
+    if len(normalized_labels) != len(set(normalized_labels)):
+        raise HTTPException(status_code=400, detail="Duplicate seat labels in request")
+    return normalized_labels
+
+
+class ReservationStore(ABC):
+    @abstractmethod
+    def add_show(self, title: str, venue: str, starts_at: datetime):
+        """Create a show; 400 if one with the same title and start time exists."""
+
+    @abstractmethod
+    def add_seats(self, show_id: int, seat_labels: list[str]):
+        """Create seats for a show; returns the new seats."""
+
+    @abstractmethod
+    def list_seats(self, show_id: int):
+        """Return `{id, show_id, seat_number}` for every seat of a show."""
+
+    @abstractmethod
+    def hold(self, user_id: int, show_id: int, seat_label: str, hold_minutes: int):
+        """Place a HELD reservation on a seat; 409 if the seat already has an active reservation."""
+
+    @abstractmethod
+    def confirm(self, reservation_id: int):
+        """Confirm a HELD reservation; idempotent, expires holds past `hold_expiry`."""
+
+    @abstractmethod
+    def release(self, reservation_id: int):
+        """Cancel a HELD reservation; idempotent."""
+
+    @abstractmethod
+    def availability(self, show_id: int):
+        """Return `{seat_id, seat_number, status, hold_expiry}` for every seat of a show."""
+
+
+class SqlReservationStore(ReservationStore):
+    def __init__(self, db, seatmap=None, gate=None, advisory_locks: bool = False, load_seatmap: bool = True):
+        self.db = db
+        self.seatmap = seatmap  # optional node-local SeatMap, kept in sync after each commit
+        self.load_seatmap = load_seatmap  # False when `db` may be a replica: read the seat map, never (re)build it
+        self.gate = gate  # optional SeatGate coalescing concurrent holds on the same seat
+        self.advisory_locks = advisory_locks
+
+    def _get_show(self, show_id: int, for_update: bool = False):
+        query = self.db.query(Show).filter(Show.id == show_id)
+        if for_update:
+            query = query.with_for_update(key_share=True)
+        show = query.first()
+        if not show:
+            raise HTTPException(status_code=404, detail="Show not found")
+        return show
+
+    def _seat_position(self, seat_id: int):
+        """(show_id, ordinal) of a seat; only looked up when the seat map is enabled."""
+        if self.seatmap is None:
+            return None
+        return self.db.execute(select(Seat.show_id, Seat.ordinal).where(Seat.id == seat_id)).one()
+
+    def _update_seatmap(self, position, status: str, hold_expiry: datetime | None = None):
+        if position is not None:
+            show_id, ordinal = position
+            self.seatmap.set_status(show_id, {ordinal: status}, hold_expiries={ordinal: hold_expiry} if hold_expiry else None)
+
+    def _seat_is_taken(self, show_id: int, seat_label: str):
+        return self.db.scalar(
+            select(Reservation.id)
+            .join(Seat, Seat.id == Reservation.seat_id)
+            .where(Seat.show_id == show_id, Seat.seat_number == seat_label, Reservation.status.in_(ACTIVE_STATUSES))
+            .limit(1)
+        ) is not None
+
+    def add_show(self, title, venue, starts_at):
+        db = self.db
+        existing_show = db.query(Show).filter(Show.title == title, Show.starts_at == starts_at).first()
+        if existing_show:
+            raise HTTPException(status_code=400, detail="Show with the same title and start time already exists")
+
+        new_show = Show(title=title, venue=venue, starts_at=starts_at)
+        db.add(new_show)
+        db.flush([new_show])
+        db.add(ShowInventory(show_id=new_show.id))
+        db.commit()
+        get_catalog_cache().invalidate("catalog")
+        return new_show
+
+    def add_seats(self, show_id, seat_labels):
+        db = self.db
+        normalized_labels = normalize_seat_request(seat_labels)
+        # lock the show so concurrent bulk inserts get consecutive, non-overlapping ordinals
+        self._get_show(show_id, for_update=True)
+        next_ordinal = db.scalar(select(func.coalesce(func.max(Seat.ordinal) + 1, 0)).where(Seat.show_id == show_id))
+
+        new_seats = [
+            Seat(show_id = show_id, seat_number=label, ordinal=next_ordinal + i)
+            for i, label in enumerate(normalized_labels)
+        ]
+
+        # Bulk save seats into database and handle potential integrity errors
+        db.add_all(new_seats)
+        try:
+            db.flush()  # populate new_seats with IDs
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="One or more seat labels already exist for this show")
+
+        adjust_inventory(db, show_id, total=len(new_seats))
+        db.commit()
+        get_catalog_cache().invalidate("catalog")
+        if self.seatmap is not None:
+            new_ordinals = range(next_ordinal, next_ordinal + len(new_seats))
+            self.seatmap.set_status(show_id, {ordinal: "AVAILABLE" for ordinal in new_ordinals}, seat_count=new_ordinals.stop)
+
+        return new_seats
+
+    def list_seats(self, show_id):
+        self._get_show(show_id)
+        # plain column tuples; no ORM identity map or per-row model validation
+        rows = self.db.execute(
+            select(Seat.id, Seat.show_id, Seat.seat_number).where(Seat.show_id == show_id).order_by(Seat.id)
+        ).all()
+        return [{"id": seat_id, "show_id": seat_show_id, "seat_number": label} for seat_id, seat_show_id, label in rows]
+
+    def _seat_freed(self, seat_id: int):
+        # only needed when the gate remembers taken seats
+        if self.gate is not None and self.gate.taken_ttl_seconds > 0:
+            seat = self.db.get(Seat, seat_id)
+            self.gate.forget((seat.show_id, seat.seat_number))
+
+    def hold(self, user_id, show_id, seat_label, hold_minutes):
+        db = self.db
+        seat_label = normalize_seat_labels(seat_label)
+
+        # the node-local table may be stale, so it only tells us to check with an index lookup
+        # (cheaper than a failed insert) before refusing the seat
+        if self.seatmap is not None and self.seatmap.is_taken(db, show_id, seat_label, load=self.load_seatmap):
+            if self._seat_is_taken(show_id, seat_label):
+                raise SeatTaken()
+
+        if self.gate is None:
+            return self._hold(user_id, show_id, seat_label, hold_minutes)
+        return self.gate.run((show_id, seat_label), lambda: self._hold(user_id, show_id, seat_label, hold_minutes))
+
+    def _hold(self, user_id, show_id, seat_label, hold_minutes):
+        db = self.db
+        if self.advisory_locks and not try_lock_seat(db, show_id, seat_label):
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Seat is being reserved by another request")
+
+        self._get_show(show_id)
+
+        # check if seat exists for the show
+        seat = db.query(Seat).filter(Seat.show_id == show_id, Seat.seat_number == seat_label).first()
+        if not seat:
+            raise HTTPException(status_code=404, detail="Seat not found for the specified show")
+        position = (show_id, seat.ordinal) if self.seatmap is not None else None
+
+        # create reservation with hold status "HELD"
+        new_reservation = Reservation(
+            user_id = user_id,
+            seat_id = seat.id,
+            status = "HELD",
+            hold_expiry = calculate_hold_expiry(hold_minutes),
+        )
+
+        db.add(new_reservation)
+        try:
+            db.flush()  # populate new_reservation with ID
+        except IntegrityError as exc:
+            db.rollback()
+            # only the one-active-reservation index means the seat is taken; anything else (e.g. a
+            # user deleted mid-request failing its foreign key) is not a seat conflict
+            if exc.orig.diag.constraint_name != SEAT_TAKEN_CONSTRAINT:
+                raise
+            raise SeatTaken()
+
+        # if flush is successful, record the event, count the hold and commit the transaction
+        hold_expiry = new_reservation.hold_expiry
+        record_event(db, "HELD", new_reservation.id, user_id, seat.id, show_id, hold_expiry=hold_expiry)
+        adjust_inventory(db, show_id, held=1)
+        db.commit()
+        reservation_changed(user_id)
+        self._update_seatmap(position, "HELD", hold_expiry)
+        db.refresh(new_reservation)
+
+        return new_reservation
+
+    def confirm(self, reservation_id):
+        db = self.db
+        # Lock reservation row to avoid two concurrent confirmations
+        reservation = db.query(Reservation).filter(Reservation.id == reservation_id).with_for_update().first()
+        if not reservation:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+
+        if reservation.status == "CONFIRMED":
+            return reservation
+
+        # check if reservation has expired
+        if reservation.status != "HELD":
+            raise HTTPException(status_code=400, detail=f"Cannot confirm a reservation with status {reservation.status}")
+
+        position = self._seat_position(reservation.seat_id)
+        now_db = db.scalar(select(func.now()))
+        if reservation.hold_expiry <= now_db:
+            reservation.status = "EXPIRED"
+            record_event(db, "EXPIRED", reservation.id, reservation.user_id, reservation.seat_id, show_id_for_seat(reservation.seat_id))
+            adjust_inventory(db, show_id_for_seat(reservation.seat_id), held=-1)
+            db.commit()
+            reservation_changed(reservation.user_id)
+            self._update_seatmap(position, "AVAILABLE")
+            self._seat_freed(reservation.seat_id)
+            raise HTTPException(status_code=400, detail="Reservation has expired")
+
+        reservation.status = "CONFIRMED"
+        record_event(db, "CONFIRMED", reservation.id, reservation.user_id, reservation.seat_id, show_id_for_seat(reservation.seat_id))
+        adjust_inventory(db, show_id_for_seat(reservation.seat_id), held=-1, confirmed=1)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Seat is already reserved")
+
+        reservation_changed(reservation.user_id)
+        self._update_seatmap(position, "CONFIRMED")
+        db.refresh(reservation)
+        return reservation
+
+    def release(self, reservation_id):
+        db = self.db
+        reservation = db.query(Reservation).filter(Reservation.id == reservation_id).with_for_update().first()
+        if not reservation:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+
+        if reservation.status == "CANCELLED":
+            return reservation
+
+        if reservation.status != "HELD":
+            raise HTTPException(status_code=400, detail=f"Cannot cancel a reservation with status {reservation.status}")
+
+        # cancel reservation
+        position = self._seat_position(reservation.seat_id)
+        reservation.status = "CANCELLED"
+        record_event(db, "CANCELLED", reservation.id, reservation.user_id, reservation.seat_id, show_id_for_seat(reservation.seat_id))
+        adjust_inventory(db, show_id_for_seat(reservation.seat_id), held=-1)
+
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=500, detail="Failed to cancel reservation due to a server error")
+
+        reservation_changed(reservation.user_id)
+        self._update_seatmap(position, "AVAILABLE")
+        self._seat_freed(reservation.seat_id)
+        db.refresh(reservation)
+
+        return reservation
+
+    def availability(self, show_id):
+        # node-local fast path
+        if self.seatmap is not None:
+            seats = self.seatmap.availability(self.db, show_id, load=self.load_seatmap)
+            if seats is not None:
+                return seats
+
+        self._get_show(show_id)
+        rows = self.db.execute(
+            select(Seat.id, Seat.seat_number, Reservation.status, Reservation.hold_expiry)
+            .outerjoin(Reservation, and_(Reservation.seat_id == Seat.id, Reservation.status.in_(ACTIVE_STATUSES)))
+            .where(Seat.show_id == show_id)
+            .order_by(Seat.id)
+        ).all()
+        return [
+            {
+                "seat_id": row.id,
+                "seat_number": row.seat_number,
+                "status": row.status or "AVAILABLE",
+                "hold_expiry": row.hold_expiry if row.status == "HELD" else None,
+            }
+            for row in rows
+        ]
+
+
+@dataclass
+class ShowRecord:
+    id: int
+    title: str
+    venue: str
+    starts_at: datetime
+
+
+@dataclass
+class SeatRecord:
+    id: int
+    show_id: int
+    seat_number: str
+
+
+@dataclass
+class ReservationRecord:
+    id: int
+    user_id: int
+    seat_id: int
+    status: str
+    hold_expiry: datetime
+    created_at: datetime
+    updated_at: datetime
+
+
+class InMemoryReservationStore(ReservationStore):
+    """
+    Process-local store. Each seat maps onto one of `stripes` locks, so holds
+    on different seats proceed in parallel while holds on the same seat are
+    serialized, mirroring the per-seat unique index in Postgres.
+    """
+
+    def __init__(self, stripes: int = 64, clock=None):
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._catalog_lock = threading.Lock()  # guards show/seat creation
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self._show_ids = itertools.count(1)
+        self._seat_ids = itertools.count(1)
+        self._reservation_ids = itertools.count(1)
+
+        self._shows = {}             # show_id -> ShowRecord
+        self._seats = {}             # seat_id -> SeatRecord
+        self._seats_by_label = {}    # (show_id, seat_number) -> seat_id
+        self._seats_by_show = {}     # show_id -> [seat_id, ...]
+        self._reservations = {}      # reservation_id -> ReservationRecord
+        self._active = {}            # seat_id -> reservation_id (HELD or CONFIRMED)
+
+    def _lock_for(self, seat_id: int):
+        return self._stripes[seat_id % len(self._stripes)]
+
+    def _require_show(self, show_id: int):
+        if show_id not in self._shows:
+            raise HTTPException(status_code=404, detail="Show not found")
+
+    def _get_reservation(self, reservation_id: int):
+        reservation = self._reservations.get(reservation_id)
+        if not reservation:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        return reservation
+
+    def add_show(self, title, venue, starts_at):
+        with self._catalog_lock:
+            if any(show.title == title and show.starts_at == starts_at for show in self._shows.values()):
+                raise HTTPException(status_code=400, detail="Show with the same title and start time already exists")
+
+            show = ShowRecord(id=next(self._show_ids), title=title, venue=venue, starts_at=starts_at)
+            self._shows[show.id] = show
+            self._seats_by_show[show.id] = []
+        return show
+
+    def add_seats(self, show_id, seat_labels):
+        self._require_show(show_id)
+        normalized_labels = normalize_seat_request(seat_labels)
+
+        with self._catalog_lock:
+            if any((show_id, label) in self._seats_by_label for label in normalized_labels):
+                raise HTTPException(status_code=409, detail="One or more seat labels already exist for this show")
+
+            new_seats = [SeatRecord(id=next(self._seat_ids), show_id=show_id, seat_number=label) for label in normalized_labels]
+            for seat in new_seats:
+                self._seats[seat.id] = seat
+                self._seats_by_label[(show_id, seat.seat_number)] = seat.id
+                self._seats_by_show[show_id].append(seat.id)
+        return new_seats
+
+    def list_seats(self, show_id):
+        self._require_show(show_id)
+        seats = [self._seats[seat_id] for seat_id in self._seats_by_show[show_id]]
+        return [{"id": seat.id, "show_id": seat.show_id, "seat_number": seat.seat_number} for seat in seats]
+
+    def hold(self, user_id, show_id, seat_label, hold_minutes):
+        self._require_show(show_id)
+        seat_id = self._seats_by_label.get((show_id, normalize_seat_labels(seat_label)))
+        if seat_id is None:
+            raise HTTPException(status_code=404, detail="Seat not found for the specified show")
+
+        with self._lock_for(seat_id):
+            if seat_id in self._active:
+                raise HTTPException(status_code=409, detail="Seat is already reserved")
+
+            now = self._clock()
+            reservation = ReservationRecord(
+                id=next(self._reservation_ids),
+                user_id=user_id,
+                seat_id=seat_id,
+                status="HELD",
+                hold_expiry=now + timedelta(minutes=hold_minutes),
+                created_at=now,
+                updated_at=now,
+            )
+            self._reservations[reservation.id] = reservation
+            self._active[seat_id] = reservation.id
+        return reservation
+
+    def confirm(self, reservation_id):
+        reservation = self._get_reservation(reservation_id)
+        with self._lock_for(reservation.seat_id):
+            if reservation.status == "CONFIRMED":
+                return reservation
+
+            if reservation.status != "HELD":
+                raise HTTPException(status_code=400, detail=f"Cannot confirm a reservation with status {reservation.status}")
+
+            now = self._clock()
+            reservation.updated_at = now
+            if reservation.hold_expiry <= now:
+                reservation.status = "EXPIRED"
+                del self._active[reservation.seat_id]
+                raise HTTPException(status_code=400, detail="Reservation has expired")
+
+            reservation.status = "CONFIRMED"
+        return reservation
+
+    def release(self, reservation_id):
+        reservation = self._get_reservation(reservation_id)
+        with self._lock_for(reservation.seat_id):
+            if reservation.status == "CANCELLED":
+                return reservation
+
+            if reservation.status != "HELD":
+                raise HTTPException(status_code=400, detail=f"Cannot cancel a reservation with status {reservation.status}")
+
+            reservation.status = "CANCELLED"
+            reservation.updated_at = self._clock()
+            del self._active[reservation.seat_id]
+        return reservation
+
+    def availability(self, show_id):
+        self._require_show(show_id)
+        seats = []
+        for seat_id in self._seats_by_show[show_id]:
+            reservation_id = self._active.get(seat_id)
+            reservation = self._reservations[reservation_id] if reservation_id else None
+            seats.append({
+                "seat_id": seat_id,
+                "seat_number": self._seats[seat_id].seat_number,
+                "status": reservation.status if reservation else "AVAILABLE",
+                "hold_expiry": reservation.hold_expiry if reservation and reservation.status == "HELD" else None,
+            })
+        return seats
+
+
+# process-wide in-memory store for RESERVATION_STORE=memory
+@cached_on_settings
+def get_memory_store():
+    return InMemoryReservationStore()
+
+
+def require_sql_store():
+    """
+    For endpoints that read reservation data straight from Postgres (catalog counts, inventory,
+    history, manifest). The in-memory store does not feed those tables, caches or the outbox,
+    so with RESERVATION_STORE=memory they are refused rather than served inconsistent.
+    """
+    if settings.RESERVATION_STORE == "memory":
+        raise HTTPException(status_code=501, detail="Not available with RESERVATION_STORE=memory")
+
+
+def get_store(db=Depends(get_db)) -> ReservationStore:
+    if settings.RESERVATION_STORE == "memory":
+        return get_memory_store()
+    return SqlReservationStore(db, seatmap=get_seatmap(), gate=get_seat_gate(), advisory_locks=settings.HOT_SEAT_MODE == "advisory")
+
+
+# store for read-only endpoints, routed to the replica when possible
+def get_read_store(db=Depends(get_read_db)) -> ReservationStore:
+    if settings.RESERVATION_STORE == "memory":
+        return get_memory_store()
+    return SqlReservationStore(db, seatmap=get_seatmap(), load_seatmap=False)
@@ -0,0 +1,81 @@
+"""
+Startup warm-up for new workers.
+
+A freshly scaled-out worker would otherwise take its first onsale requests
+with an empty connection pool (a TCP + auth handshake per request) and cold
+seat state. `warm_up` runs in the background from the app's lifespan hook:
+- opens WARMUP_POOL_CONNECTIONS connections at once and returns them to the
+  pool (up to DATABASE_POOL_SIZE of them stay open);
+- loads seat lookup and availability for shows starting within
+  WARMUP_SHOW_WINDOW_HOURS: into the shared seat map when it is enabled,
+  otherwise by running the availability query so those pages are in
+  Postgres' buffer cache;
+- removes seat map files of shows that were deleted or have already started.
+
+The app reports ready (GET /health/ready) only once this has finished.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from sqlalchemy import func, select, text
+
+from app.config import settings
+from app.database import SessionLocal, get_engine
+from app.models import Show
+from app.seatmap import get_seatmap
+from app.store import SqlReservationStore
+
+logger = logging.getLogger(__name__)
+
+
+def warm_pool(engine, connections: int):
+    """Check out `connections` connections at the same time, then release them to the pool."""
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            opened.append(connection)
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+def upcoming_show_ids(db, window: timedelta, limit: int):
+    return db.scalars(
+        select(Show.id)
+        .where(Show.starts_at >= func.now(), Show.starts_at < func.now() + window)
+        .order_by(Show.starts_at, Show.id)
+        .limit(limit)
+    ).all()
+
+
+def preload_shows(db, show_ids):
+    store = SqlReservationStore(db, seatmap=get_seatmap())
+    for show_id in show_ids:
+        store.availability(show_id)
+
+
+def warm_up():
+    """Warm the pool and upcoming shows; returns what was done, for the readiness endpoint."""
+    started = time.perf_counter()
+    connections = warm_pool(get_engine(), settings.WARMUP_POOL_CONNECTIONS)
+
+    db = SessionLocal()
+    try:
+        show_ids = []
+        # with RESERVATION_STORE=memory the shows live in the process, not in Postgres
+        if settings.RESERVATION_STORE == "sql":
+            show_ids = upcoming_show_ids(db, timedelta(hours=settings.WARMUP_SHOW_WINDOW_HOURS), settings.WARMUP_MAX_SHOWS)
+            preload_shows(db, show_ids)
+            seatmap = get_seatmap()
+            if seatmap is not None:
+                seatmap.cleanup(db)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    logger.info("Warm-up done: %d connections, %d shows in %.3fs", connections, len(show_ids), elapsed)
+    return {"connections": connections, "shows": len(show_ids), "seconds": round(elapsed, 3)}
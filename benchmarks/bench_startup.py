@@ -0,0 +1,54 @@
+"""
+Cold-start benchmark: import time, app construction and warm-up.
+
+Each run starts a fresh interpreter, so module imports are measured cold
+(bytecode caches aside).
+
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --warm   # also time warm_up() (needs the database)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+app = main.create_app()
+created = time.perf_counter()
+result = {"import": imported - started, "create_app": created - imported}
+if WARM:
+    from app.warmup import warm_up
+    warm_up()
+    result["warm_up"] = time.perf_counter() - created
+print(json.dumps(result))
+"""
+
+
+def run(runs: int, warm: bool):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", f"WARM = {warm}\n{PROBE}"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append(json.loads(output.splitlines()[-1]))
+
+    for phase in samples[0]:
+        timings = [sample[phase] * 1000 for sample in samples]
+        print(f"{phase}: median {statistics.median(timings):.1f}ms, min {min(timings):.1f}ms, max {max(timings):.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warm", action="store_true")
+    args = parser.parse_args()
+    run(args.runs, args.warm)
@@ -0,0 +1,59 @@
+"""
+Microbenchmark of the reservation domain logic on the in-memory store.
+
+    python benchmarks/bench_store.py --seats 50000 --threads 8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+
+from app.store import InMemoryReservationStore
+
+
+def run(seats: int, threads: int, contended: bool):
+    store = InMemoryReservationStore()
+    store.add_show("Benchmark", "Arena", datetime(2030, 1, 1, tzinfo=timezone.utc))
+    labels = [f"S{i}" for i in range(seats)]
+    store.add_seats(1, labels)
+
+    conflicts = [0] * threads
+
+    def worker(index):
+        # contended: every thread races for every seat; otherwise threads split the seats
+        for label in labels if contended else labels[index::threads]:
+            try:
+                reservation = store.hold(user_id=index, show_id=1, seat_label=label, hold_minutes=10)
+                store.confirm(reservation.id)
+            except HTTPException:
+                conflicts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    attempts = seats * threads if contended else seats
+    print(f"hold+confirm: {attempts} attempts in {elapsed:.3f}s ({attempts / elapsed:,.0f} ops/s), {sum(conflicts)} conflicts")
+
+    started = time.perf_counter()
+    store.availability(1)
+    print(f"availability: {seats} seats in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seats", type=int, default=50_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--contended", action="store_true", help="all threads compete for every seat")
+    args = parser.parse_args()
+    run(args.seats, args.threads, args.contended)
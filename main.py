@@ -1,24 +1,46 @@
-import uvicorn
+import asyncio
+import logging
 
-from datetime import timedelta
-from fastapi import FastAPI, HTTPException, Depends
-from app.schema import UserCreate, UserOut, ShowCreate, ShowOut, SeatCreateBulk, SeatOut, ReservationCreate, ReservationOut, UserLogin, Token
-from sqlalchemy import select, func
-from sqlalchemy.exc import IntegrityError
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta
+from anyio import to_thread
+from fastapi import APIRouter, FastAPI, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.schema import UserCreate, UserOut, ShowCreate, ShowOut, SeatCreateBulk, SeatOut, ReservationCreate, ReservationOut, UserLogin, Token, ReservationStatus, ReservationHistoryPage, ShowCatalogPage, ShowInventoryOut, SeatAvailabilityOut, SeatColumnsOut, SeatAvailabilityColumnsOut, ListFormat, ExportFormat
+from sqlalchemy import select, func, tuple_, union_all
 
-from app.models import User, Show, Seat, Reservation
+from app.models import User, Show, Seat, Reservation, ReservationArchive, ShowInventory
 from app.database import get_db
-from app.services import hash_password, normalize_seat_labels, calculate_hold_expiry
-from app.auth import verify_password, create_access_token, get_current_user
-from app.config import settings
+from app.services import hash_password, encode_show_cursor, decode_show_cursor
+from app.auth import verify_password, create_access_token, get_current_user, get_current_user_id, get_admin_user
+from app.config import Settings, settings, configure_settings
+from app.cache import get_history_cache, get_catalog_cache
+from app.inventory import get_inventory
+from app.store import ReservationStore, get_store, get_read_store, require_sql_store, SEAT_COLUMNS, AVAILABILITY_COLUMNS
+from app.responses import list_response
+from app.replica import get_read_db
+from app.manifest import stream_manifest, MEDIA_TYPES
+from app.warmup import warm_up
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
-@app.get("/")
+WARMUP_RETRY_MAX_SECONDS = 60.0
+
+router = APIRouter()
+
+@router.get("/")
 def read_root():
     return {"message": "Welcome to the Event Ticketing System API"}
 
-@app.post("/users/", response_model=UserOut)
+@router.get("/health/ready")
+def readiness(request: Request):
+    """503 until the startup warm-up has succeeded, so load balancers hold traffic off a cold worker"""
+    if not request.app.state.ready:
+        # warmup_error: why the last attempt failed while it is being retried
+        return JSONResponse(status_code=503, content={"status": "warming_up", "warmup_error": request.app.state.warmup_error})
+    return {"status": "ready", "warmup": request.app.state.warmup}
+
+@router.post("/users/", response_model=UserOut)
 def create_user(user: UserCreate, db=Depends(get_db)):
     """Create the user endpoint"""
     existing_user = db.query(User).filter(User.email == user.email).first()
@@ -38,170 +60,240 @@ def create_user(user: UserCreate, db=Depends(get_db)):
 
     return new_user
 
-@app.post("/login", response_model=Token)
+ARCHIVED_STATUSES = {"EXPIRED", "CANCELLED"}
+
+def history_query(model, user_id: int, status: list[str], before_id: int | None, limit: int):
+    """One user's newest reservations from `model` (live or archive table), joined to seat and show"""
+    # archived rows outlive their seat and show, so keep them (from their own columns) when those are gone
+    archived = model is ReservationArchive
+    show_id = model.show_id if archived else Seat.show_id
+    # single join instead of walking User.reservations -> Seat -> Show lazily
+    query = (
+        select(
+            model.id,
+            model.status,
+            model.hold_expiry,
+            model.created_at,
+            model.seat_id.label("seat_id"),
+            Seat.seat_number,
+            show_id.label("show_id"),
+            Show.title.label("show_title"),
+            (model.show_starts_at if archived else Show.starts_at).label("show_starts_at"),
+        )
+        .join(Seat, Seat.id == model.seat_id, isouter=archived)
+        .join(Show, Show.id == show_id, isouter=archived)
+        .where(model.user_id == user_id)
+        .order_by(model.id.desc())
+        .limit(limit + 1)  # one extra row tells us whether there is a next page
+    )
+    if status:
+        query = query.where(model.status.in_(status))
+    if before_id is not None:
+        query = query.where(model.id < before_id)
+    return query
+
+@router.get("/users/me/reservations", response_model=ReservationHistoryPage, dependencies=[Depends(require_sql_store)])
+def list_my_reservations(
+    status: list[ReservationStatus] = Query(default=[]),
+    before_id: int | None = None,
+    limit: int = Query(default=20, gt=0, le=100),
+    db=Depends(get_read_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """List the current user's reservations, newest first, with seat and show details"""
+    cache_key = (tuple(sorted(status)), before_id, limit)
+    cached = get_history_cache().get(current_user_id, cache_key)
+    if cached is not None:
+        return cached
+
+    # live reservations plus archived EXPIRED/CANCELLED ones; ids are unique across both tables
+    branches = [history_query(Reservation, current_user_id, status, before_id, limit)]
+    if not status or ARCHIVED_STATUSES.intersection(status):
+        branches.append(history_query(ReservationArchive, current_user_id, status, before_id, limit))
+    history = union_all(*branches).subquery()
+
+    rows = db.execute(select(history).order_by(history.c.id.desc()).limit(limit + 1)).all()
+    page = ReservationHistoryPage(
+        items=rows[:limit],
+        next_cursor=rows[limit - 1].id if len(rows) > limit else None,
+    )
+    get_history_cache().set(current_user_id, cache_key, page)
+    return page
+
+@router.post("/login", response_model=Token)
 def login(user: UserLogin, db = Depends(get_db)):
     curr_user = db.query(User).filter(User.email == user.email).first()
     if not curr_user or not verify_password(user.password, curr_user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     access_token = create_access_token(
-        {"sub": curr_user.id, "email": curr_user.email},
+        {"sub": str(curr_user.id), "email": curr_user.email},
         timedelta(minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-@app.post("/shows/", response_model=ShowOut)
-def create_show(show: ShowCreate, db=Depends(get_db), current_user: User = Depends(get_current_user)):
-    existing_show = db.query(Show).filter(Show.title == show.title, Show.starts_at == show.starts_at).first()
-    if existing_show:
-        raise HTTPException(status_code=400, detail="Show with the same title and start time already exists")
-    
-    new_show = Show(**show.dict())
+@router.post("/shows/", response_model=ShowOut)
+def create_show(show: ShowCreate, store: ReservationStore = Depends(get_store), current_user: User = Depends(get_current_user)):
+    return store.add_show(show.title, show.venue, show.starts_at)
 
-    db.add(new_show)
-    db.flush(new_show)
-    db.commit()
+@router.get("/shows/", response_model=ShowCatalogPage, dependencies=[Depends(require_sql_store)])
+def list_shows(
+    venue: str | None = None,
+    starts_after: datetime | None = None,
+    starts_before: datetime | None = None,
+    q: str | None = Query(default=None, min_length=1),
+    cursor: str | None = None,
+    limit: int = Query(default=20, gt=0, le=100),
+    db=Depends(get_read_db),
+):
+    """Browse the show catalog ordered by start time, with per-show seat counts"""
+    cache_key = (venue, starts_after, starts_before, q, cursor, limit)
+    cached = get_catalog_cache().get("catalog", cache_key)
+    if cached is not None:
+        return cached
+
+    # seat counts come from the maintained counter table, not a COUNT over reservations
+    query = (
+        select(
+            Show.id,
+            Show.title,
+            Show.venue,
+            Show.starts_at,
+            func.coalesce(ShowInventory.total_seats, 0).label("total_seats"),
+            func.coalesce(ShowInventory.held_seats, 0).label("held_seats"),
+            func.coalesce(ShowInventory.confirmed_seats, 0).label("confirmed_seats"),
+        )
+        .outerjoin(ShowInventory, ShowInventory.show_id == Show.id)
+        .order_by(Show.starts_at, Show.id)
+        .limit(limit + 1)
+    )
+    if venue:
+        query = query.where(Show.venue == venue)
+    if starts_after:
+        query = query.where(Show.starts_at >= starts_after)
+    if starts_before:
+        query = query.where(Show.starts_at < starts_before)
+    if q:
+        # served by the pg_trgm index on title
+        query = query.where(Show.title.icontains(q, autoescape=True))
+    if cursor:
+        try:
+            cursor_starts_at, cursor_id = decode_show_cursor(cursor)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+        query = query.where(tuple_(Show.starts_at, Show.id) > tuple_(cursor_starts_at, cursor_id))
 
-    return new_show
+    rows = db.execute(query).all()
+    items = [
+        {**row._mapping, "available_seats": row.total_seats - row.held_seats - row.confirmed_seats}
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_show_cursor(last.starts_at, last.id)
 
-@app.post("/shows/{show_id}/seats", response_model=list[SeatOut])
-def create_seats_bulk(show_id: int, seats: SeatCreateBulk, db=Depends(get_db), current_user: User = Depends(get_current_user)):
+    page = ShowCatalogPage(items=items, next_cursor=next_cursor)
+    get_catalog_cache().set("catalog", cache_key, page)
+    return page
+
+@router.post("/shows/{show_id}/seats", response_model=list[SeatOut])
+def create_seats_bulk(show_id: int, seats: SeatCreateBulk, store: ReservationStore = Depends(get_store), current_user: User = Depends(get_current_user)):
     """Bulk create seats endpoint"""
-    show = db.query(Show).filter(Show.id == show_id).first()
-    if not show:
-        raise HTTPException(status_code=404, detail="Show not found")
-    
-    # normalize seat labels and dedupe labels in the request
-    try:
-        normalized_labels = [normalize_seat_labels(s) for s in seats.seat_numbers]
-    except ValueError as ve:
-        raise HTTPException(status_code=422, detail=str(ve))
-    
-    # check for seat duplicates
-    if len(normalized_labels) != len(set(normalized_labels)):
-        raise HTTPException(status_code=400, detail="Duplicate seat labels in request")
-
-    new_seats = [Seat(show_id = show_id, seat_number=labels) for labels in normalized_labels]
-
-    # Bulk save seats into database and handle potential integrity errors
-    db.add_all(new_seats)
-    try: 
-        db.flush()  # populate new_seats with IDs
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=409, detail="One or more seat labels already exist for this show")
-    
-    db.commit()
+    return store.add_seats(show_id, seats.seat_numbers)
+
+@router.get("/shows/{show_id}/seats", response_model=list[SeatOut] | SeatColumnsOut)
+def get_seats_for_show(show_id: int, format: ListFormat = "rows", store: ReservationStore = Depends(get_read_store), current_user_id: int = Depends(get_current_user_id)):
+    """List seats for a show; `format=columnar` returns parallel arrays instead of row objects"""
+    return list_response(store.list_seats(show_id), SEAT_COLUMNS, format)
 
-    return new_seats
+@router.get("/shows/{show_id}/availability", response_model=list[SeatAvailabilityOut] | SeatAvailabilityColumnsOut)
+def get_show_availability(show_id: int, format: ListFormat = "rows", store: ReservationStore = Depends(get_read_store), current_user_id: int = Depends(get_current_user_id)):
+    """Availability snapshot: every seat with its AVAILABLE/HELD/CONFIRMED status"""
+    return list_response(store.availability(show_id), AVAILABILITY_COLUMNS, format)
 
-@app.get("/shows/{show_id}/seats", response_model=list[SeatOut])
-def get_seats_for_show(show_id: int, db=Depends(get_db), current_user: User = Depends(get_current_user)):
-    """create seats for a show"""
-    show = db.query(Show).filter(Show.id == show_id).first()
-    if not show:
+@router.get("/shows/{show_id}/inventory", response_model=ShowInventoryOut, dependencies=[Depends(require_sql_store)])
+def get_show_inventory(show_id: int, db=Depends(get_read_db)):
+    """Seat counts for a show, read from its counter row"""
+    inventory = get_inventory(db, show_id)
+    if not inventory:
         raise HTTPException(status_code=404, detail="Show not found")
-    
-    # fetch seats for the show
-    seats = db.query(Seat).filter(Seat.show_id == show_id).all()
-    return seats
 
-# reservation endpoints
-@app.post("/reservations/hold", response_model=ReservationOut)
-def hold_seat_reservation(reservation: ReservationCreate, db=Depends(get_db), current_user: User = Depends(get_current_user)):
-    # check if user exists
-    user_id = current_user.id
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # check if show exists
-    show = db.query(Show).filter(Show.id == reservation.show_id).first()
-    if not show:
+    available = inventory.total_seats - inventory.held_seats - inventory.confirmed_seats
+    return ShowInventoryOut(
+        show_id=show_id,
+        total_seats=inventory.total_seats,
+        held_seats=inventory.held_seats,
+        confirmed_seats=inventory.confirmed_seats,
+        available_seats=available,
+        sold_out=available <= 0,
+    )
+
+@router.get("/admin/shows/{show_id}/manifest", dependencies=[Depends(require_sql_store)])
+def export_show_manifest(show_id: int, format: ExportFormat = "csv", db=Depends(get_read_db), admin: User = Depends(get_admin_user)):
+    """Stream the confirmed-seat manifest (seat, name, email) straight out of a Postgres COPY"""
+    if db.get(Show, show_id) is None:
         raise HTTPException(status_code=404, detail="Show not found")
-    
-    # check if seat exists for the show
-    seat_label = normalize_seat_labels(reservation.seat_number)
-    seat = db.query(Seat).filter(Seat.show_id == reservation.show_id, Seat.seat_number == seat_label).first()
-    if not seat:
-        raise HTTPException(status_code=404, detail="Seat not found for the specified show")
-    
-    # create reservation with hold status "HELD"
-    new_reservation = Reservation(
-        user_id = user_id,
-        seat_id = seat.id,
-        status = "HELD",
-        hold_expiry = calculate_hold_expiry(reservation.hold_minutes),
+    dbapi_connection = db.connection().connection.dbapi_connection
+    return StreamingResponse(
+        stream_manifest(dbapi_connection, show_id, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="show-{show_id}-manifest.{format}"'},
     )
 
-    db.add(new_reservation)
-    try:
-        db.flush()  # populate new_reservation with ID
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=409, detail="Seat is already reserved")
-    
-    # if flush is successful, commit the transaction
-    db.commit()
-    db.refresh(new_reservation)
+# reservation endpoints
+@router.post("/reservations/hold", response_model=ReservationOut)
+def hold_seat_reservation(reservation: ReservationCreate, store: ReservationStore = Depends(get_store), current_user: User = Depends(get_current_user)):
+    return store.hold(current_user.id, reservation.show_id, reservation.seat_number, reservation.hold_minutes)
 
-    return new_reservation
+@router.post("/reservations/{reservation_id}/confirm", response_model=ReservationOut)
+def confirm_seat_reservation(reservation_id: int, store: ReservationStore = Depends(get_store), current_user: User = Depends(get_current_user)):
+    return store.confirm(reservation_id)
 
-@app.post("/reservations/{reservation_id}/confirm", response_model=ReservationOut)
-def confirm_seat_reservation(reservation_id: int, db=Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Lock reservation row to avoid two concurrent confirmations
-    reservation = db.query(Reservation).filter(Reservation.id ==reservation_id).with_for_update().first()
+@router.post("/reservations/{reservation_id}/release", response_model=ReservationOut)
+def release_seat_reservation(reservation_id: int, store: ReservationStore = Depends(get_store), current_user: User = Depends(get_current_user)):
+    return store.release(reservation_id)
 
-    if not reservation:
-        raise HTTPException(status_code=404, detail="Reservation not found")
-    
-    if reservation.status == "CONFIRMED":
-       return reservation
-    
-    # check if reservation has expired
-    if reservation.status != "HELD":
-        raise HTTPException(status_code=400, detail=f"Cannot confirm a reservation with status {reservation.status}")
-    
-    now_db = db.scalar(select(func.now()))
-    if reservation.hold_expiry <= now_db:
-        reservation.status = "EXPIRED"
-        db.commit()
-        raise HTTPException(status_code=400, detail="Reservation has expired")
-
-    reservation.status = "CONFIRMED"
-    try:
-        db.commit() 
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=409, detail="Seat is already reserved")
-
-    db.refresh(reservation)
-    return reservation
-
-@app.post("/reservations/{reservation_id}/release", response_model=ReservationOut)
-def release_seat_reservation(reservation_id: int, db=Depends(get_db), current_user: User = Depends(get_current_user)):
-    reservation = db.query(Reservation).filter(Reservation.id == reservation_id).with_for_update().first()
-    if not reservation:
-        raise HTTPException(status_code=404, detail="Reservation not found")
-    
-    if reservation.status == "CANCELLED":
-        return reservation
-    
-    if reservation.status != "HELD":
-        raise HTTPException(status_code=400, detail=f"Cannot cancel a reservation with status {reservation.status}")
-    
-    # cancel reservation
-    reservation.status = "CANCELLED"
-
-    try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=500, detail="Failed to cancel reservation due to a server error")
-    
-    db.refresh(reservation)
+async def _warm_up(app: FastAPI):
+    # stay unready until a warm-up succeeds, retrying with capped exponential backoff
+    delay = settings.WARMUP_RETRY_SECONDS
+    while True:
+        try:
+            app.state.warmup = await to_thread.run_sync(warm_up)
+        except Exception as exc:
+            logger.exception("Warm-up failed; retrying in %.1fs", delay)
+            app.state.warmup_error = f"{type(exc).__name__}: {exc}"
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+            continue
+        app.state.warmup_error = None
+        app.state.ready = True
+        return
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warming = asyncio.create_task(_warm_up(app))
+    yield
+    if not warming.done():
+        warming.cancel()  # still retrying; nothing to wait for on shutdown
+    with suppress(asyncio.CancelledError):
+        await warming
 
-    return reservation
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """Build the API; nothing touches the environment or the database until the app starts"""
+    if settings is not None:
+        configure_settings(settings)
+    app = FastAPI(lifespan=lifespan)
+    app.state.ready = False
+    app.state.warmup = None
+    app.state.warmup_error = None
+    app.include_router(router)
+    return app
+
+# default app for `uvicorn main:app`; cheap to build, settings are read on first use
+app = create_app()
 
 if __name__ == "__main__":
+    import uvicorn  # only needed when run directly
+
     uvicorn.run(app, host="127.0.0.1", port=8001) 
\ No newline at end of file
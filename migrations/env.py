@@ -4,13 +4,13 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
-from app.database import Base, DATABASE_URL
+from app.database import Base, database_url
 import app.models  # Import all models to ensure they are registered with Base
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option('sqlalchemy.url', DATABASE_URL)
+config.set_main_option('sqlalchemy.url', database_url())
 
 
 # Interpret the config file for Python logging.
@@ -24,6 +24,22 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# partitions of reservations_archive (the DEFAULT one from the migration and the
+# monthly ones app.archive creates at runtime) are not models; autogenerate must
+# leave them, and the archived rows in them, alone
+ARCHIVE_PARTITION_PREFIX = "reservations_archive_"
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table":
+        table_name = name
+    elif type_ in ("index", "unique_constraint", "foreign_key_constraint", "column"):
+        table_name = object.table.name
+    else:
+        return True
+    return not (reflected and compare_to is None and table_name.startswith(ARCHIVE_PARTITION_PREFIX))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -49,7 +65,8 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         compare_server_default=True,
-        compare_type=True
+        compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -74,7 +91,8 @@ def run_migrations_online() -> None:
             connection=connection, 
             target_metadata=target_metadata,
             compare_server_default=True,
-            compare_type=True
+            compare_type=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,50 @@
+"""add reservations archive
+
+Revision ID: 3c1f9a2d7b40
+Revises: 805fb246cbb5
+Create Date: 2026-10-19 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9a2d7b40'
+down_revision: Union[str, Sequence[str], None] = '805fb246cbb5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # terminal reservations are moved here by app.archive, partitioned by show date
+    op.create_table('reservations_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('show_starts_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('seat_id', sa.Integer(), nullable=False),
+    sa.Column('show_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('hold_expiry', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint("status IN ('EXPIRED', 'CANCELLED')", name='reservation_archive_status_check'),
+    sa.PrimaryKeyConstraint('id', 'show_starts_at'),
+    postgresql_partition_by='RANGE (show_starts_at)'
+    )
+    op.create_index(op.f('ix_reservations_archive_user_id'), 'reservations_archive', ['user_id'], unique=False)
+    op.create_index(op.f('ix_reservations_archive_show_id'), 'reservations_archive', ['show_id'], unique=False)
+    # catch-all partition; monthly partitions are created on demand by the archival job
+    op.execute("CREATE TABLE reservations_archive_default PARTITION OF reservations_archive DEFAULT")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_reservations_archive_show_id'), table_name='reservations_archive')
+    op.drop_index(op.f('ix_reservations_archive_user_id'), table_name='reservations_archive')
+    # dropping the parent drops every partition with it
+    op.drop_table('reservations_archive')
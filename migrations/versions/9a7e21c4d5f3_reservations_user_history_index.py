@@ -0,0 +1,31 @@
+"""reservations user history index
+
+Revision ID: 9a7e21c4d5f3
+Revises: 3c1f9a2d7b40
+Create Date: 2026-10-19 10:03:47.881204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a7e21c4d5f3'
+down_revision: Union[str, Sequence[str], None] = '3c1f9a2d7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (user_id, id) covers plain user_id lookups too, so the old index is redundant
+    op.create_index('ix_reservations_user_id_id', 'reservations', ['user_id', 'id'], unique=False)
+    op.drop_index(op.f('ix_reservations_user_id'), table_name='reservations')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_reservations_user_id'), 'reservations', ['user_id'], unique=False)
+    op.drop_index('ix_reservations_user_id_id', table_name='reservations')
@@ -0,0 +1,31 @@
+"""reservations archive user history index
+
+Revision ID: a6d4e2f19c73
+Revises: f3a9c6d2e847
+Create Date: 2026-10-19 18:42:05.337921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d4e2f19c73'
+down_revision: Union[str, Sequence[str], None] = 'f3a9c6d2e847'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # same (user_id, id) keyset index as the live table; created on every partition
+    op.create_index('ix_reservations_archive_user_id_id', 'reservations_archive', ['user_id', 'id'], unique=False)
+    op.drop_index(op.f('ix_reservations_archive_user_id'), table_name='reservations_archive')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_reservations_archive_user_id'), 'reservations_archive', ['user_id'], unique=False)
+    op.drop_index('ix_reservations_archive_user_id_id', table_name='reservations_archive')
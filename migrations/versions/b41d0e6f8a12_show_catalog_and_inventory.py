@@ -0,0 +1,56 @@
+"""show catalog and inventory
+
+Revision ID: b41d0e6f8a12
+Revises: 9a7e21c4d5f3
+Create Date: 2026-10-19 11:26:05.517392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41d0e6f8a12'
+down_revision: Union[str, Sequence[str], None] = '9a7e21c4d5f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_shows_title_trgm', 'shows', ['title'], unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_shows_starts_at_id', 'shows', ['starts_at', 'id'], unique=False)
+    op.drop_index(op.f('ix_shows_starts_at'), table_name='shows')
+
+    op.create_table('show_inventory',
+    sa.Column('show_id', sa.Integer(), nullable=False),
+    sa.Column('total_seats', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('held_seats', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('confirmed_seats', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['show_id'], ['shows.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('show_id')
+    )
+    # backfill counters for existing shows
+    op.execute("""
+        INSERT INTO show_inventory (show_id, total_seats, held_seats, confirmed_seats)
+        SELECT sh.id,
+               count(s.id),
+               count(r.id) FILTER (WHERE r.status = 'HELD'),
+               count(r.id) FILTER (WHERE r.status = 'CONFIRMED')
+        FROM shows sh
+        LEFT JOIN seats s ON s.show_id = sh.id
+        LEFT JOIN reservations r ON r.seat_id = s.id AND r.status IN ('HELD', 'CONFIRMED')
+        GROUP BY sh.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('show_inventory')
+    op.create_index(op.f('ix_shows_starts_at'), 'shows', ['starts_at'], unique=False)
+    op.drop_index('ix_shows_starts_at_id', table_name='shows')
+    op.drop_index('ix_shows_title_trgm', table_name='shows', postgresql_using='gin')
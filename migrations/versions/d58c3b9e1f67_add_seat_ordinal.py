@@ -0,0 +1,41 @@
+"""add seat ordinal
+
+Revision ID: d58c3b9e1f67
+Revises: b41d0e6f8a12
+Create Date: 2026-10-19 14:41:12.093558
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd58c3b9e1f67'
+down_revision: Union[str, Sequence[str], None] = 'b41d0e6f8a12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('seats', sa.Column('ordinal', sa.Integer(), nullable=True))
+    # existing seats are numbered in creation order within each show
+    op.execute("""
+        UPDATE seats s
+        SET ordinal = numbered.ordinal
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY show_id ORDER BY id) - 1 AS ordinal
+            FROM seats
+        ) numbered
+        WHERE numbered.id = s.id
+    """)
+    op.alter_column('seats', 'ordinal', nullable=False)
+    op.create_index('unique_ordinal_per_show', 'seats', ['show_id', 'ordinal'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('unique_ordinal_per_show', table_name='seats')
+    op.drop_column('seats', 'ordinal')
@@ -0,0 +1,50 @@
+"""add reservation outbox
+
+Revision ID: f3a9c6d2e847
+Revises: d58c3b9e1f67
+Create Date: 2026-10-19 16:08:53.226740
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c6d2e847'
+down_revision: Union[str, Sequence[str], None] = 'd58c3b9e1f67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('reservation_events',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('position', sa.BigInteger(), nullable=True),
+    sa.Column('reservation_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('seat_id', sa.Integer(), nullable=False),
+    sa.Column('show_id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('hold_expiry', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint("event_type IN ('HELD', 'CONFIRMED', 'EXPIRED', 'CANCELLED')", name='reservation_event_type_check'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('position')
+    )
+    op.create_index('ix_reservation_events_unsequenced', 'reservation_events', ['id'], unique=False, postgresql_where=sa.text('position IS NULL'))
+    op.create_table('outbox_offsets',
+    sa.Column('consumer', sa.String(), nullable=False),
+    sa.Column('position', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('consumer')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('outbox_offsets')
+    op.drop_index('ix_reservation_events_unsequenced', table_name='reservation_events', postgresql_where=sa.text('position IS NULL'))
+    op.drop_table('reservation_events')
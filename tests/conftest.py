@@ -1,9 +1,15 @@
 import pytest
+from fastapi import Depends
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from main import app    
-from app.database import get_db, engine as app_engine, SessionLocal
+from main import app
+from app.auth import get_current_user, get_current_user_id
+from app.config import settings
+from app.models import User
+from app.database import get_db, get_engine
+from app.replica import get_read_db
+from app.store import InMemoryReservationStore, get_read_store, get_store
 
 
 @pytest.fixture
@@ -12,9 +18,9 @@ def db_session():
     Start a Savepoint transaction for each test and roll it back at the end.
     Use the same engine as the app so Postgres indexes and conditions work.
     """
-    connection = app_engine.connect()
+    connection = get_engine().connect()
     transaction = connection.begin()
-    TestingSessionLocal = sessionmaker(bind = connection,autocommit=False, autoflush=False)
+    TestingSessionLocal = sessionmaker(bind = connection,autocommit=False, autoflush=False, join_transaction_mode="create_savepoint")
     session = TestingSessionLocal()
 
     try:
@@ -26,7 +32,7 @@ def db_session():
 
 @pytest.fixture
 def client(db_session):
-    """Overide get_db to yield the per-test session"""
+    """Overide get_db and get_read_db to yield the per-test session"""
     def override_get_db():
         try:
             yield db_session
@@ -34,8 +40,35 @@ def client(db_session):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
 
     
+
+
+@pytest.fixture
+def memory_client(monkeypatch):
+    """
+    Client running with RESERVATION_STORE=memory on a fresh in-memory store.
+    No database is touched: sessions are overridden with None and the lifespan
+    warm-up is not started. Authenticate with helpers.token_headers().
+    """
+    monkeypatch.setattr(settings, "RESERVATION_STORE", "memory")
+    store = InMemoryReservationStore()
+
+    def no_db():
+        yield None
+
+    def token_user(user_id: int = Depends(get_current_user_id)):
+        # write endpoints look the caller up in Postgres; stand in for it from the token
+        return User(id=user_id)
+
+    app.dependency_overrides[get_db] = no_db
+    app.dependency_overrides[get_read_db] = no_db
+    app.dependency_overrides[get_current_user] = token_user
+    app.dependency_overrides[get_store] = lambda: store
+    app.dependency_overrides[get_read_store] = lambda: store
+    yield TestClient(app)
+    app.dependency_overrides.clear()
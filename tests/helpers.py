@@ -1,6 +1,9 @@
 """
 Helper functions for tests
 """
+from datetime import timedelta
+
+from app.auth import create_access_token
 
 def make_user(client, name="Alice", email="alice@example.com", phone="0712345678", pwd="secret123"):
     resp = client.post("/users/", json={
@@ -40,3 +43,11 @@ def hold(client, show_id: int, seat_label: str, minutes: int = 10, headers=None)
 
 def confirm_reservation(client, reservation_id: int, headers=None):
     return client.post(f"/reservations/{reservation_id}/confirm", headers=headers)
+
+def release_reservation(client, reservation_id: int, headers=None):
+    return client.post(f"/reservations/{reservation_id}/release", headers=headers)
+
+def token_headers(user_id: int):
+    """Bearer headers for a user id without going through /login (no users table needed)."""
+    token = create_access_token({"sub": str(user_id)}, timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from sqlalchemy import text
+from app.models import Reservation, ReservationArchive
+from app.archive import archive_terminal_reservations
+from helpers import add_seats, make_show, make_user, hold, login, release_reservation
+from conftest import client, db_session
+
+def test_archive_moves_terminal_reservations_only(client, db_session):
+    user = make_user(client, name="Dan", email="dan@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Opera", headers=headers)
+    add_seats(client, show["id"], ["D1", "D2"], headers=headers)
+
+    # D1 is released (terminal), D2 stays held (active)
+    released = hold(client, show_id=show["id"], seat_label="D1", minutes=5, headers=headers).json()
+    held = hold(client, show_id=show["id"], seat_label="D2", minutes=5, headers=headers).json()
+    assert release_reservation(client, released["id"], headers=headers).status_code == 200
+
+    archived = archive_terminal_reservations(db_session, batch_size=10, older_than=timedelta(0))
+    assert archived == 1
+
+    assert db_session.get(Reservation, released["id"]) is None
+    assert db_session.get(Reservation, held["id"]) is not None
+
+    row = db_session.query(ReservationArchive).filter(ReservationArchive.id == released["id"]).one()
+    assert row.status == "CANCELLED"
+    assert row.show_id == show["id"]
+
+
+def test_archive_partitions_are_utc_months_in_any_session_time_zone(client, db_session):
+    user = make_user(client, name="Eve", email="eve@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    # either side of the US DST change, in months no other test archives into
+    march = make_show(client, title="Spring Gala", starts_at="2041-03-05T20:00:00Z", headers=headers)
+    april = make_show(client, title="Spring Gala", starts_at="2041-04-05T20:00:00Z", headers=headers)
+    for show in (march, april):
+        add_seats(client, show["id"], ["E1"], headers=headers)
+        reservation = hold(client, show_id=show["id"], seat_label="E1", headers=headers).json()
+        release_reservation(client, reservation["id"], headers=headers)
+
+    db_session.execute(text("SET LOCAL TIME ZONE 'America/New_York'"))
+    assert archive_terminal_reservations(db_session, batch_size=10, older_than=timedelta(0)) >= 2
+    db_session.execute(text("SET LOCAL TIME ZONE 'UTC'"))
+
+    bounds = db_session.execute(text(
+        "SELECT pg_get_expr(c.relpartbound, c.oid) FROM pg_class c "
+        "WHERE c.relname IN ('reservations_archive_p204103', 'reservations_archive_p204104') ORDER BY c.relname"
+    )).scalars().all()
+    assert bounds == [
+        "FOR VALUES FROM ('2041-03-01 00:00:00+00') TO ('2041-04-01 00:00:00+00')",
+        "FOR VALUES FROM ('2041-04-01 00:00:00+00') TO ('2041-05-01 00:00:00+00')",
+    ]
@@ -0,0 +1,42 @@
+from helpers import add_seats, make_show, make_user, hold, login, confirm_reservation
+from conftest import client, db_session
+
+def test_catalog_lists_shows_with_seat_counts(client):
+    user = make_user(client, name="Gus", email="gus@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Gala Evening", venue="Hall 9", starts_at="2031-05-01T19:00:00Z", headers=headers)
+    add_seats(client, show["id"], ["G1", "G2", "G3"], headers=headers)
+
+    held = hold(client, show_id=show["id"], seat_label="G1", headers=headers).json()
+    hold(client, show_id=show["id"], seat_label="G2", headers=headers)
+    assert confirm_reservation(client, held["id"], headers=headers).status_code == 200
+
+    resp = client.get("/shows/", params={"venue": "Hall 9", "q": "gala"})
+    assert resp.status_code == 200
+    items = resp.json()["items"]
+    assert len(items) == 1
+    assert items[0]["id"] == show["id"]
+    assert items[0]["total_seats"] == 3
+    assert items[0]["held_seats"] == 1
+    assert items[0]["confirmed_seats"] == 1
+    assert items[0]["available_seats"] == 1
+
+def test_catalog_keyset_pagination_and_date_filter(client):
+    user = make_user(client, name="Hana", email="hana@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    starts = ["2032-01-01T20:00:00Z", "2032-01-02T20:00:00Z", "2032-01-03T20:00:00Z"]
+    shows = [make_show(client, title=f"Tour {i}", venue="Dome", starts_at=s, headers=headers) for i, s in enumerate(starts)]
+
+    params = {"venue": "Dome", "starts_after": "2032-01-01T00:00:00Z", "limit": 2}
+    first = client.get("/shows/", params=params).json()
+    assert [item["id"] for item in first["items"]] == [shows[0]["id"], shows[1]["id"]]
+    assert first["next_cursor"]
+
+    second = client.get("/shows/", params={**params, "cursor": first["next_cursor"]}).json()
+    assert [item["id"] for item in second["items"]] == [shows[2]["id"]]
+    assert second["next_cursor"] is None
+
+    bounded = client.get("/shows/", params={"venue": "Dome", "starts_before": "2032-01-02T00:00:00Z"}).json()
+    assert [item["id"] for item in bounded["items"]] == [shows[0]["id"]]
+
+    assert client.get("/shows/", params={"cursor": "not-a-cursor"}).status_code == 400
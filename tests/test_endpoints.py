@@ -1,6 +1,9 @@
+import pytest
 from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
 from app.models import Seat, Reservation
-from helpers import add_seats, make_show, make_user, hold, confirm_reservation, login
+from app.store import SqlReservationStore
+from helpers import add_seats, make_show, make_user, hold, confirm_reservation, login, token_headers
 from datetime import datetime, timezone
 from conftest import client, db_session
 
@@ -108,7 +111,7 @@ def test_confirm_success_and_expired_path(client, db_session):
     db_session.commit()
 
     # Confirm should now 400 and flip to EXPIRED in your endpoint code
-    c2 = confirm(client, res2_id)
+    c2 = confirm_reservation(client, res2_id, headers=headers)
     assert c2.status_code == 400
     # optional: re-read to assert EXPIRED
     expired = db_session.get(Reservation, res2_id)
@@ -117,3 +120,71 @@ def test_confirm_success_and_expired_path(client, db_session):
 
 
 
+def test_show_availability_snapshot(client):
+    user = make_user(client, name="Kim", email="kim@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Matinee", headers=headers)
+    add_seats(client, show["id"], ["K1", "K2", "K3"], headers=headers)
+
+    held = hold(client, show_id=show["id"], seat_label="K1", headers=headers).json()
+    confirmed = hold(client, show_id=show["id"], seat_label="K2", headers=headers).json()
+    confirm_reservation(client, confirmed["id"], headers=headers)
+
+    resp = client.get(f"/shows/{show['id']}/availability", headers=headers)
+    assert resp.status_code == 200
+    seats = {seat["seat_number"]: seat for seat in resp.json()}
+    assert seats["K1"]["status"] == "HELD"
+    assert seats["K1"]["hold_expiry"] is not None
+    assert seats["K2"]["status"] == "CONFIRMED"
+    assert seats["K3"] == {"seat_id": seats["K3"]["seat_id"], "seat_number": "K3", "status": "AVAILABLE", "hold_expiry": None}
+
+def test_seat_list_and_availability_columnar_format(client):
+    user = make_user(client, name="Lea", email="lea@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Premiere", headers=headers)
+    seats = add_seats(client, show["id"], ["L1", "L2"], headers=headers).json()
+    hold(client, show_id=show["id"], seat_label="L2", headers=headers)
+
+    rows = client.get(f"/shows/{show['id']}/seats", headers=headers).json()
+    assert rows == [{"id": seat["id"], "show_id": show["id"], "seat_number": seat["seat_number"]} for seat in seats]
+
+    columns = client.get(f"/shows/{show['id']}/seats", params={"format": "columnar"}, headers=headers).json()
+    assert columns == {
+        "id": [seat["id"] for seat in seats],
+        "show_id": [show["id"], show["id"]],
+        "seat_number": ["L1", "L2"],
+    }
+
+    availability = client.get(f"/shows/{show['id']}/availability", params={"format": "columnar"}, headers=headers).json()
+    assert availability["seat_number"] == ["L1", "L2"]
+    assert availability["status"] == ["AVAILABLE", "HELD"]
+    assert availability["hold_expiry"][0] is None
+    assert availability["hold_expiry"][1].endswith("Z")
+
+def test_openapi_documents_both_list_formats(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    for path, row_model, columns_model in (
+        ("/shows/{show_id}/seats", "SeatOut", "SeatColumnsOut"),
+        ("/shows/{show_id}/availability", "SeatAvailabilityOut", "SeatAvailabilityColumnsOut"),
+    ):
+        schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema["anyOf"] == [
+            {"type": "array", "items": {"$ref": f"#/components/schemas/{row_model}"}},
+            {"$ref": f"#/components/schemas/{columns_model}"},
+        ]
+
+def test_writes_require_an_existing_user(client, db_session):
+    user = make_user(client, name="Wes", email="wes@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Ghost Night", headers=headers)
+    add_seats(client, show["id"], ["W1"], headers=headers)
+
+    # a valid token for a user id that is not in the database
+    ghost = token_headers(999999)
+    assert client.post("/shows/", json={"title": "Phantom", "venue": "Arena", "starts_at": "2030-01-01T20:00:00Z"}, headers=ghost).status_code == 401
+    assert hold(client, show_id=show["id"], seat_label="W1", headers=ghost).status_code == 401
+
+    # a foreign key failure is not mistaken for the seat being taken
+    with pytest.raises(IntegrityError):
+        SqlReservationStore(db_session).hold(999999, show["id"], "W1", 5)
+    assert hold(client, show_id=show["id"], seat_label="W1", headers=headers).status_code == 200
@@ -0,0 +1,55 @@
+from sqlalchemy import select, func
+from app.models import Reservation, ShowInventory
+from app.inventory import reconcile_inventory
+from app.expiry import expire_stale_holds
+from helpers import add_seats, make_show, make_user, hold, login, confirm_reservation, release_reservation
+from conftest import client, db_session
+
+def test_inventory_counters_follow_reservation_lifecycle(client):
+    user = make_user(client, name="Ivy", email="ivy@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Quartet", headers=headers)
+    add_seats(client, show["id"], ["H1", "H2"], headers=headers)
+
+    r1 = hold(client, show_id=show["id"], seat_label="H1", headers=headers).json()
+    r2 = hold(client, show_id=show["id"], seat_label="H2", headers=headers).json()
+    inv = client.get(f"/shows/{show['id']}/inventory").json()
+    assert (inv["held_seats"], inv["confirmed_seats"], inv["sold_out"]) == (2, 0, True)
+
+    confirm_reservation(client, r1["id"], headers=headers)
+    release_reservation(client, r2["id"], headers=headers)
+    inv = client.get(f"/shows/{show['id']}/inventory").json()
+    assert inv == {
+        "show_id": show["id"],
+        "total_seats": 2,
+        "held_seats": 0,
+        "confirmed_seats": 1,
+        "available_seats": 1,
+        "sold_out": False,
+    }
+
+    assert client.get("/shows/999999/inventory").status_code == 404
+
+def test_expiry_sweep_and_reconciliation(client, db_session):
+    user = make_user(client, name="Jon", email="jon@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Recital", headers=headers)
+    add_seats(client, show["id"], ["J1", "J2"], headers=headers)
+    res = hold(client, show_id=show["id"], seat_label="J1", headers=headers).json()
+
+    # force the hold into the past and sweep it
+    now_db = db_session.scalar(select(func.now()))
+    db_session.query(Reservation).filter(Reservation.id == res["id"]).update({Reservation.hold_expiry: now_db})
+    db_session.commit()
+
+    expired = expire_stale_holds(db_session)
+    assert [row.id for row in expired] == [res["id"]]
+    assert db_session.get(Reservation, res["id"]).status == "EXPIRED"
+    assert client.get(f"/shows/{show['id']}/inventory").json()["held_seats"] == 0
+
+    # corrupt the counters, then rebuild them from the source tables
+    db_session.query(ShowInventory).filter(ShowInventory.show_id == show["id"]).update({ShowInventory.total_seats: 40, ShowInventory.held_seats: 7})
+    db_session.commit()
+    reconcile_inventory(db_session, show_ids=[show["id"]])
+    inv = client.get(f"/shows/{show['id']}/inventory").json()
+    assert (inv["total_seats"], inv["held_seats"], inv["confirmed_seats"]) == (2, 0, 0)
@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+from app.config import settings
+from app.manifest import stream_manifest
+from helpers import add_seats, make_show, make_user, hold, login, confirm_reservation
+from conftest import client, db_session
+
+def setup_show(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["ops@example.com"])
+    admin = make_user(client, name="Ops", email="ops@example.com", phone="0700000001")
+    admin_headers = login(client, email=admin["email"], pwd="secret123")
+    fan = make_user(client, name='Zoe "Z" O\'Neil', email="zoe@example.com", phone="0700000002")
+    fan_headers = login(client, email=fan["email"], pwd="secret123")
+
+    show = make_show(client, title="Manifest Night", headers=admin_headers)
+    add_seats(client, show["id"], ["M1", "M2", "M3"], headers=admin_headers)
+    for label in ("M3", "M1"):
+        reservation = hold(client, show_id=show["id"], seat_label=label, headers=fan_headers).json()
+        confirm_reservation(client, reservation["id"], headers=fan_headers)
+    hold(client, show_id=show["id"], seat_label="M2", headers=fan_headers)  # held, not sold
+    return show, admin_headers, fan_headers
+
+def test_manifest_csv_lists_confirmed_seats_in_seat_order(client, monkeypatch):
+    show, admin_headers, _ = setup_show(client, monkeypatch)
+
+    resp = client.get(f"/admin/shows/{show['id']}/manifest", headers=admin_headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [row["seat_number"] for row in rows] == ["M1", "M3"]
+    assert rows[0]["user_name"] == 'Zoe "Z" O\'Neil'
+    assert rows[0]["email"] == "zoe@example.com"
+
+def test_manifest_ndjson_is_valid_json_per_line(client, monkeypatch):
+    show, admin_headers, _ = setup_show(client, monkeypatch)
+
+    resp = client.get(f"/admin/shows/{show['id']}/manifest", params={"format": "ndjson"}, headers=admin_headers)
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["seat_number"] for line in lines] == ["M1", "M3"]
+    assert lines[1]["user_name"] == 'Zoe "Z" O\'Neil'
+
+def test_manifest_requires_admin_and_existing_show(client, monkeypatch):
+    show, admin_headers, fan_headers = setup_show(client, monkeypatch)
+
+    assert client.get(f"/admin/shows/{show['id']}/manifest", headers=fan_headers).status_code == 403
+    assert client.get("/admin/shows/999999/manifest", headers=admin_headers).status_code == 404
+
+def test_stream_manifest_chunks_and_stops_early(client, db_session, monkeypatch):
+    show, _, _ = setup_show(client, monkeypatch)
+    dbapi_connection = db_session.connection().connection.dbapi_connection
+
+    chunks = list(stream_manifest(dbapi_connection, show["id"], chunk_size=16))
+    assert len(chunks) > 1
+    assert b"".join(chunks).decode().splitlines()[0] == "seat_number,user_name,email,reservation_id,confirmed_at"
+
+    # abandoning the stream cancels the COPY and leaves the connection usable
+    stream = stream_manifest(dbapi_connection, show["id"], chunk_size=16)
+    next(stream)
+    stream.close()
+    with dbapi_connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        assert cursor.fetchone() == (1,)
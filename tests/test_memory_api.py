@@ -0,0 +1,43 @@
+"""
+Reservation endpoints on the in-memory store: same HTTP behavior, no database.
+"""
+from app.config import settings
+from app.store import InMemoryReservationStore, SqlReservationStore, get_store
+from helpers import add_seats, make_show, hold, confirm_reservation, release_reservation, token_headers
+from conftest import memory_client
+
+def test_reservation_flow_without_a_database(memory_client):
+    headers = token_headers(1)
+    show = make_show(memory_client, title="Memory Lane", headers=headers)
+    assert memory_client.post("/shows/", json={"title": "Memory Lane", "venue": "Arena", "starts_at": "2030-01-01T20:00:00Z"}, headers=headers).status_code == 400
+
+    assert add_seats(memory_client, show["id"], ["A1", " a2 "], headers=headers).status_code == 200
+    assert add_seats(memory_client, show["id"], ["A1"], headers=headers).status_code == 409
+
+    held = hold(memory_client, show_id=show["id"], seat_label="a1", headers=headers)
+    assert held.status_code == 200
+    assert held.json()["user_id"] == 1
+    assert hold(memory_client, show_id=show["id"], seat_label="A1", headers=token_headers(2)).status_code == 409
+    assert hold(memory_client, show_id=show["id"], seat_label="Z9", headers=headers).status_code == 404
+
+    assert confirm_reservation(memory_client, held.json()["id"], headers=headers).json()["status"] == "CONFIRMED"
+    second = hold(memory_client, show_id=show["id"], seat_label="A2", headers=headers).json()
+    assert release_reservation(memory_client, second["id"], headers=headers).json()["status"] == "CANCELLED"
+
+    resp = memory_client.get(f"/shows/{show['id']}/availability", params={"format": "columnar"}, headers=headers)
+    assert resp.json()["seat_number"] == ["A1", "A2"]
+    assert resp.json()["status"] == ["CONFIRMED", "AVAILABLE"]
+
+def test_endpoints_reading_postgres_are_refused(memory_client):
+    headers = token_headers(1)
+    for path in ("/shows/", "/shows/1/inventory", "/users/me/reservations", "/admin/shows/1/manifest"):
+        resp = memory_client.get(path, headers=headers)
+        assert resp.status_code == 501, path
+
+def test_store_is_selected_by_setting(monkeypatch):
+    assert isinstance(get_store(db=None), SqlReservationStore)
+
+    monkeypatch.setattr(settings, "RESERVATION_STORE", "memory")
+    store = get_store(db=None)
+    assert isinstance(store, InMemoryReservationStore)
+    assert get_store(db=None) is store  # one store per process
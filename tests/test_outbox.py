@@ -0,0 +1,76 @@
+import json
+from sqlalchemy import delete, func, select
+from app.models import OutboxOffset, ReservationEvent
+from app.outbox import QueueSink, NDJSONFileSink, prune_delivered, relay_batch, sequence_events
+from helpers import add_seats, make_show, make_user, hold, login, confirm_reservation, release_reservation
+from conftest import client, db_session
+
+def test_state_changes_are_relayed_in_order(client, db_session):
+    user = make_user(client, name="Nia", email="nia@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Overture", headers=headers)
+    add_seats(client, show["id"], ["N1", "N2"], headers=headers)
+
+    r1 = hold(client, show_id=show["id"], seat_label="N1", headers=headers).json()
+    r2 = hold(client, show_id=show["id"], seat_label="N2", headers=headers).json()
+    confirm_reservation(client, r1["id"], headers=headers)
+    release_reservation(client, r2["id"], headers=headers)
+
+    assert sequence_events(db_session) == 4
+    sink = QueueSink()
+    assert relay_batch(db_session, sink, consumer="box-office", batch_size=3) == 3
+    assert relay_batch(db_session, sink, consumer="box-office", batch_size=3) == 1
+    assert relay_batch(db_session, sink, consumer="box-office", batch_size=3) == 0
+
+    events = sink.queue.get() + sink.queue.get()
+    assert [(e["reservation_id"], e["event_type"]) for e in events] == [
+        (r1["id"], "HELD"), (r2["id"], "HELD"), (r1["id"], "CONFIRMED"), (r2["id"], "CANCELLED"),
+    ]
+    assert all(e["show_id"] == show["id"] for e in events)
+    # gap-free positions give consumers a simple offset
+    positions = [e["position"] for e in events]
+    assert positions == list(range(positions[0], positions[0] + 4))
+
+def test_each_consumer_keeps_its_own_offset(client, db_session, tmp_path):
+    user = make_user(client, name="Oli", email="oli@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Finale", headers=headers)
+    add_seats(client, show["id"], ["O1"], headers=headers)
+    hold(client, show_id=show["id"], seat_label="O1", headers=headers)
+    sequence_events(db_session)
+
+    path = tmp_path / "events.ndjson"
+    assert relay_batch(db_session, NDJSONFileSink(str(path)), consumer="analytics") == 1
+    assert relay_batch(db_session, QueueSink(), consumer="email") == 1
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["event_type"] for line in lines] == ["HELD"]
+    assert lines[0]["hold_expiry"].endswith("Z")
+
+def test_events_every_consumer_received_are_pruned(client, db_session):
+    user = make_user(client, name="Pam", email="pam@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Coda", headers=headers)
+    add_seats(client, show["id"], ["P1", "P2", "P3"], headers=headers)
+    db_session.execute(delete(OutboxOffset))  # only this test's consumers count
+    for label in ("P1", "P2", "P3"):
+        hold(client, show_id=show["id"], seat_label=label, headers=headers)
+    sequence_events(db_session)
+    first = db_session.scalar(select(func.max(ReservationEvent.position))) - 2
+
+    relay_batch(db_session, QueueSink(), consumer="fast", batch_size=3)
+    relay_batch(db_session, QueueSink(), consumer="slow", batch_size=1)
+    remaining = lambda: db_session.scalars(select(ReservationEvent.position).order_by(ReservationEvent.position)).all()
+
+    # the slow consumer still needs everything after its first event
+    prune_delivered(db_session)
+    assert remaining() == [first, first + 1, first + 2]
+
+    relay_batch(db_session, QueueSink(), consumer="slow", batch_size=3)
+    assert prune_delivered(db_session, batch_size=1) == 2
+    # the newest event stays, so positions keep counting up after a prune
+    assert remaining() == [first + 2]
+
+    release_reservation(client, client.get("/users/me/reservations", headers=headers).json()["items"][0]["id"], headers=headers)
+    sequence_events(db_session)
+    assert remaining() == [first + 2, first + 3]
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from app.auth import create_access_token, user_id_from_token
+from app.replica import CAN_READ_STATS_SQL, REPLICA_LAG_SQL, ReplicaRouter
+from app.database import get_db
+from helpers import add_seats, make_show, make_user, login
+from conftest import client, db_session
+
+class LagSession:
+    """Stands in for a replica session; returns a fixed lag and counts checks."""
+    def __init__(self, lag, can_read_stats=True):
+        self.lag = lag
+        self.can_read_stats = can_read_stats
+        self.checks = 0
+
+    def scalar(self, statement):
+        if statement is CAN_READ_STATS_SQL:
+            return self.can_read_stats
+        self.checks += 1
+        return self.lag
+
+def test_replica_staleness_policy_is_cached():
+    router = ReplicaRouter(max_lag_seconds=5, check_interval_seconds=60, read_your_writes_seconds=10)
+    session = LagSession(lag=1.5)
+    assert router.replica_is_fresh(session) is True
+
+    # within the check interval the cached verdict is reused
+    session.lag = 30
+    assert router.replica_is_fresh(session) is True
+    assert session.checks == 1
+
+    lagging = ReplicaRouter(max_lag_seconds=5, check_interval_seconds=0, read_your_writes_seconds=10)
+    assert lagging.replica_is_fresh(LagSession(lag=30)) is False
+    assert lagging.replica_is_fresh(LagSession(lag=None)) is False
+
+def test_null_lag_is_logged_once_with_the_likely_cause(caplog):
+    router = ReplicaRouter(max_lag_seconds=5, check_interval_seconds=0, read_your_writes_seconds=10)
+    unprivileged = LagSession(lag=None, can_read_stats=False)
+    with caplog.at_level("WARNING", logger="app.replica"):
+        assert router.replica_is_fresh(unprivileged) is False
+        assert router.replica_is_fresh(unprivileged) is False
+    assert unprivileged.checks == 2
+    assert len(caplog.records) == 1
+    assert "pg_monitor" in caplog.records[0].getMessage()
+
+    caplog.clear()
+    stopped = ReplicaRouter(max_lag_seconds=5, check_interval_seconds=0, read_your_writes_seconds=10)
+    with caplog.at_level("WARNING", logger="app.replica"):
+        stopped.replica_is_fresh(LagSession(lag=None, can_read_stats=True))
+    assert "not streaming" in caplog.records[0].getMessage()
+
+def test_read_your_writes_pins_recent_writers_to_primary():
+    router = ReplicaRouter(max_lag_seconds=5, check_interval_seconds=1, read_your_writes_seconds=10)
+    assert router.must_read_primary(None) is False
+    assert router.must_read_primary(7) is False
+
+    router.note_write(7)
+    assert router.must_read_primary(7) is True
+    assert router.must_read_primary(8) is False
+
+    expired = ReplicaRouter(max_lag_seconds=5, check_interval_seconds=1, read_your_writes_seconds=0)
+    expired.note_write(7)
+    assert expired.must_read_primary(7) is False
+
+def test_user_id_from_token():
+    token = create_access_token({"sub": "42"}, timedelta(minutes=5))
+    assert user_id_from_token(token) == 42
+    assert user_id_from_token(None) is None
+    assert user_id_from_token("garbage") is None
+
+def test_lag_query_runs_and_reads_zero_on_a_primary(db_session):
+    # the streaming/receiver branches only apply on a standby; a primary is never stale
+    assert db_session.scalar(REPLICA_LAG_SQL) == 0
+    assert db_session.scalar(CAN_READ_STATS_SQL) in (True, False)
+
+def test_authenticated_reads_never_check_out_a_primary_session(client):
+    user = make_user(client, name="Ivy", email="ivy@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Matinee", headers=headers)
+    add_seats(client, show["id"], ["I1"], headers=headers)
+
+    def no_primary():
+        raise AssertionError("read-only endpoint opened a primary session")
+        yield
+
+    client.app.dependency_overrides[get_db] = no_primary
+    assert client.get(f"/shows/{show['id']}/seats", headers=headers).status_code == 200
+    assert client.get(f"/shows/{show['id']}/availability", headers=headers).status_code == 200
+    assert client.get("/users/me/reservations", headers=headers).status_code == 200
+    assert client.get(f"/shows/{show['id']}/seats", headers={"Authorization": "Bearer garbage"}).status_code == 401
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from app.models import Show
+from app.archive import archive_terminal_reservations
+from app.cache import get_history_cache
+from helpers import add_seats, make_show, make_user, hold, login, release_reservation
+from conftest import client, db_session
+
+def test_my_reservations_filters_and_paginates(client):
+    user = make_user(client, name="Eve", email="eve@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Ballet", headers=headers)
+    add_seats(client, show["id"], ["E1", "E2", "E3"], headers=headers)
+
+    ids = [hold(client, show_id=show["id"], seat_label=label, headers=headers).json()["id"] for label in ["E1", "E2", "E3"]]
+    assert release_reservation(client, ids[0], headers=headers).status_code == 200
+
+    # newest first, with show and seat details in the same payload
+    resp = client.get("/users/me/reservations", params={"limit": 2}, headers=headers)
+    assert resp.status_code == 200
+    page = resp.json()
+    assert [item["id"] for item in page["items"]] == [ids[2], ids[1]]
+    assert page["items"][0]["seat_number"] == "E3"
+    assert page["items"][0]["show_title"] == "Ballet"
+    assert page["next_cursor"] == ids[1]
+
+    resp = client.get("/users/me/reservations", params={"limit": 2, "before_id": page["next_cursor"]}, headers=headers)
+    page = resp.json()
+    assert [item["id"] for item in page["items"]] == [ids[0]]
+    assert page["next_cursor"] is None
+
+    resp = client.get("/users/me/reservations", params={"status": "HELD"}, headers=headers)
+    assert [item["status"] for item in resp.json()["items"]] == ["HELD", "HELD"]
+
+def test_my_reservations_cache_is_invalidated_on_state_change(client):
+    user = make_user(client, name="Finn", email="finn@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Circus", headers=headers)
+    add_seats(client, show["id"], ["F1"], headers=headers)
+
+    res_id = hold(client, show_id=show["id"], seat_label="F1", headers=headers).json()["id"]
+    assert client.get("/users/me/reservations", headers=headers).json()["items"][0]["status"] == "HELD"
+
+    release_reservation(client, res_id, headers=headers)
+    assert client.get("/users/me/reservations", headers=headers).json()["items"][0]["status"] == "CANCELLED"
+
+def test_my_reservations_include_archived_ones(client, db_session):
+    user = make_user(client, name="Gil", email="gil@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Recital", headers=headers)
+    add_seats(client, show["id"], ["G1", "G2", "G3"], headers=headers)
+
+    ids = [hold(client, show_id=show["id"], seat_label=label, headers=headers).json()["id"] for label in ["G1", "G2", "G3"]]
+    release_reservation(client, ids[1], headers=headers)
+    assert archive_terminal_reservations(db_session, older_than=timedelta(0)) >= 1
+    get_history_cache().clear()
+
+    # live and archived rows interleave in one keyset-paginated list
+    page = client.get("/users/me/reservations", params={"limit": 2}, headers=headers).json()
+    assert [item["id"] for item in page["items"]] == [ids[2], ids[1]]
+    assert page["items"][1]["status"] == "CANCELLED"
+    assert page["items"][1]["seat_number"] == "G2"
+    page = client.get("/users/me/reservations", params={"limit": 2, "before_id": page["next_cursor"]}, headers=headers).json()
+    assert [item["id"] for item in page["items"]] == [ids[0]]
+
+    resp = client.get("/users/me/reservations", params={"status": "CANCELLED"}, headers=headers)
+    assert [item["id"] for item in resp.json()["items"]] == [ids[1]]
+
+def test_archived_reservations_outlive_their_show(client, db_session):
+    user = make_user(client, name="Hal", email="hal@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Farewell", headers=headers)
+    add_seats(client, show["id"], ["F1"], headers=headers)
+    reservation = hold(client, show_id=show["id"], seat_label="F1", headers=headers).json()
+    release_reservation(client, reservation["id"], headers=headers)
+    archive_terminal_reservations(db_session, older_than=timedelta(0))
+
+    # deleting the show cascades to its seats; the archived row stays in history
+    db_session.query(Show).filter(Show.id == show["id"]).delete()
+    db_session.flush()
+    get_history_cache().clear()
+
+    items = client.get("/users/me/reservations", headers=headers).json()["items"]
+    assert [(item["id"], item["seat_id"], item["show_id"]) for item in items] == [(reservation["id"], reservation["seat_id"], show["id"])]
+    assert items[0]["seat_number"] is None and items[0]["show_title"] is None
+    assert items[0]["show_starts_at"].startswith("2030-01-01T20:00:00")
@@ -0,0 +1,149 @@
+import multiprocessing
+from array import array
+
+import pytest
+from fastapi import HTTPException
+
+from app.seatmap import SeatMap, SeatStateTable, AVAILABLE, HELD, CONFIRMED, UNKNOWN
+from app.store import SqlReservationStore
+from helpers import add_seats, make_show, make_user, login
+from conftest import client, db_session
+
+def _confirm_in_child(path):
+    table = SeatStateTable(path, capacity=0)
+    table.set({1: CONFIRMED})
+
+def test_seat_state_table_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "show_1")
+    table = SeatStateTable(path, capacity=4)
+    assert table.snapshot() is None  # not loaded yet
+
+    with table.locked():
+        table.load(bytes([AVAILABLE, AVAILABLE, HELD]), array("Q", [0, 0, 1_700_000_000_000_000]))
+    assert table.generation == 2
+    assert table.snapshot() == (bytes([AVAILABLE, AVAILABLE, HELD, UNKNOWN]), array("Q", [0, 0, 1_700_000_000_000_000, 0]), 3)
+
+    child = multiprocessing.get_context("fork").Process(target=_confirm_in_child, args=(path,))
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+
+    # the write from the other process is visible and bumped the generation to the next even value
+    assert table.status(1) == CONFIRMED
+    assert table.snapshot()[1][2] == 1_700_000_000_000_000
+    assert table.generation == 4
+    assert table.status(10) == UNKNOWN
+
+def test_store_keeps_seatmap_in_sync(client, db_session, tmp_path):
+    user = make_user(client, name="Mia", email="mia@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Encore", headers=headers)
+    add_seats(client, show["id"], ["M1", "M2"], headers=headers)
+
+    seatmap = SeatMap(directory=str(tmp_path), namespace="test", spare_slots=4, max_age_seconds=60)
+    store = SqlReservationStore(db_session, seatmap=seatmap)
+
+    reservation = store.hold(user["id"], show["id"], "M1", 5)
+    assert seatmap.is_taken(db_session, show["id"], "M1") is True
+    assert seatmap.is_taken(db_session, show["id"], "M2") is False
+
+    # a second attempt is rejected by the node-local table
+    with pytest.raises(HTTPException) as exc:
+        store.hold(user["id"], show["id"], "m1", 5)
+    assert exc.value.status_code == 409
+
+    statuses = {seat["seat_number"]: seat["status"] for seat in store.availability(show["id"])}
+    assert statuses == {"M1": "HELD", "M2": "AVAILABLE"}
+
+    store.release(reservation.id)
+    store.add_seats(show["id"], ["M3"])
+    statuses = {seat["seat_number"]: seat["status"] for seat in seatmap.availability(db_session, show["id"])}
+    assert statuses == {"M1": "AVAILABLE", "M2": "AVAILABLE", "M3": "AVAILABLE"}
+
+def test_replica_store_never_builds_the_seatmap(client, db_session, tmp_path):
+    user = make_user(client, name="Ren", email="ren@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Echo", headers=headers)
+    add_seats(client, show["id"], ["R1", "R2"], headers=headers)
+
+    seatmap = SeatMap(directory=str(tmp_path), namespace="test", spare_slots=4, max_age_seconds=60)
+    read_store = SqlReservationStore(db_session, seatmap=seatmap, load_seatmap=False)
+
+    # no table yet: answered by the query, and nothing is written from the (possibly lagging) session
+    assert [seat["status"] for seat in read_store.availability(show["id"])] == ["AVAILABLE", "AVAILABLE"]
+    assert seatmap.table(db_session, show["id"], load=False) is None
+    assert list(tmp_path.iterdir()) == []
+
+    # once a primary store has loaded it, the read store uses it
+    SqlReservationStore(db_session, seatmap=seatmap).hold(user["id"], show["id"], "R1", 5)
+    assert seatmap.table(db_session, show["id"], load=False) is not None
+    statuses = {seat["seat_number"]: seat["status"] for seat in read_store.availability(show["id"])}
+    assert statuses == {"R1": "HELD", "R2": "AVAILABLE"}
+
+    # same answer as the query, hold expiries included, whether the table was written by the hold or rebuilt
+    from_query = SqlReservationStore(db_session).availability(show["id"])
+    assert read_store.availability(show["id"]) == from_query
+    seatmap.max_age_seconds = 0
+    assert seatmap.availability(db_session, show["id"]) == from_query
+
+def test_stale_taken_seat_is_checked_with_the_database(client, db_session, tmp_path):
+    user = make_user(client, name="Ola", email="ola@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Hint", headers=headers)
+    add_seats(client, show["id"], ["H1", "H2"], headers=headers)
+
+    seatmap = SeatMap(directory=str(tmp_path), namespace="test", spare_slots=4, max_age_seconds=60)
+    store = SqlReservationStore(db_session, seatmap=seatmap)
+    store.hold(user["id"], show["id"], "H2", 5)
+
+    # e.g. freed on another node: this table still says CONFIRMED, but the hold goes through
+    seatmap.set_status(show["id"], {0: "CONFIRMED"})
+    assert seatmap.is_taken(db_session, show["id"], "H1") is True
+    assert store.hold(user["id"], show["id"], "H1", 5).status == "HELD"
+
+    with pytest.raises(HTTPException) as exc:
+        store.hold(user["id"], show["id"], "H2", 5)
+    assert exc.value.status_code == 409
+
+def test_full_table_is_replaced_by_a_bigger_one(client, db_session, tmp_path):
+    user = make_user(client, name="Gus", email="gus@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Growth", headers=headers)
+    add_seats(client, show["id"], ["G1", "G2"], headers=headers)
+
+    # two SeatMaps on the same directory stand in for two workers
+    first = SeatMap(directory=str(tmp_path), namespace="test", spare_slots=1, max_age_seconds=60)
+    second = SeatMap(directory=str(tmp_path), namespace="test", spare_slots=1, max_age_seconds=60)
+    old_table = first.table(db_session, show["id"])
+    assert old_table.capacity == 3
+
+    store = SqlReservationStore(db_session, seatmap=first)
+    store.add_seats(show["id"], ["G3", "G4", "G5"])
+    assert old_table.seat_count == 5  # more seats than slots: the next reader rebuilds
+
+    rows = second.availability(db_session, show["id"])
+    assert [seat["seat_number"] for seat in rows] == ["G1", "G2", "G3", "G4", "G5"]
+    assert old_table.retired
+    assert second.table(db_session, show["id"]).capacity == 6
+
+    # the first worker notices the swap and writes to the new file
+    store.hold(user["id"], show["id"], "G5", 5)
+    assert second.is_taken(db_session, show["id"], "G5") is True
+    assert not first.table(db_session, show["id"]).retired
+
+def test_cleanup_removes_tables_of_past_and_deleted_shows(client, db_session, tmp_path):
+    user = make_user(client, name="Cy", email="cy@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    past = make_show(client, title="Yesterday", starts_at="2001-01-01T20:00:00Z", headers=headers)
+    upcoming = make_show(client, title="Tomorrow", headers=headers)
+    for show in (past, upcoming):
+        add_seats(client, show["id"], ["C1"], headers=headers)
+
+    seatmap = SeatMap(directory=str(tmp_path), namespace="test", spare_slots=1, max_age_seconds=60)
+    for show_id in (past["id"], upcoming["id"], 999999):
+        seatmap.table(db_session, show_id)
+    (tmp_path / "other_seatmap_1").write_bytes(b"")  # another namespace is left alone
+
+    assert seatmap.cleanup(db_session) == [past["id"], 999999]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["other_seatmap_1", f"test_seatmap_{upcoming['id']}"]
+    assert seatmap.availability(db_session, upcoming["id"])[0]["status"] == "AVAILABLE"
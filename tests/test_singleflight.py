@@ -0,0 +1,166 @@
+"""
+Per-seat coalescing: SeatGate on its own (no database) and the advisory-lock mode.
+"""
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.database import get_engine
+from app.expiry import expire_stale_holds
+from app.models import Reservation
+from app.singleflight import SeatGate, SeatTaken, get_seat_gate, try_lock_seat
+from app.store import SqlReservationStore
+from helpers import add_seats, hold, make_show, make_user, login
+from conftest import client, db_session
+
+def contend(gate, key, fn, contenders=20):
+    """Run `contenders` threads through the gate at once; returns (results, status codes)."""
+    barrier = threading.Barrier(contenders)
+    results, statuses = [], []
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(gate.run(key, fn))
+        except HTTPException as exc:
+            statuses.append(exc.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(contenders)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, statuses
+
+def test_only_the_leader_reaches_the_database():
+    gate = SeatGate()
+    calls = []
+    release_leader = threading.Event()
+
+    def hold():
+        calls.append(1)
+        release_leader.wait(1)  # keep the flight open while the others pile up
+        return "reservation"
+
+    timer = threading.Timer(0.2, release_leader.set)
+    timer.start()
+    results, statuses = contend(gate, (1, "A1"), hold)
+    timer.join()
+
+    assert len(calls) == 1
+    assert results == ["reservation"]
+    assert statuses == [409] * 19
+
+def test_seat_specific_errors_are_shared_and_others_retried():
+    gate = SeatGate()
+    calls = []
+
+    def missing_seat():
+        calls.append(1)
+        time.sleep(0.1)
+        raise HTTPException(status_code=404, detail="Seat not found for the specified show")
+
+    # every contender gets the leader's 404 instead of asking again
+    _, statuses = contend(gate, (1, "Z9"), missing_seat)
+    assert statuses == [404] * 20
+    assert len(calls) == 1
+
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("connection reset")
+        return "reservation"
+
+    with pytest.raises(RuntimeError):
+        gate.run((1, "A2"), flaky)
+    assert gate.run((1, "A2"), flaky) == "reservation"
+
+def test_remembered_seats_are_refused_until_forgotten():
+    gate = SeatGate(taken_ttl_seconds=60)
+    assert gate.run((1, "A1"), lambda: "reservation") == "reservation"
+
+    with pytest.raises(HTTPException) as exc:
+        gate.run((1, "A1"), lambda: pytest.fail("should not reach the database"))
+    assert exc.value.status_code == 409
+
+    gate.forget((1, "A1"))
+    assert gate.run((1, "A1"), lambda: "again") == "again"
+
+def test_only_a_real_conflict_marks_the_seat_taken():
+    gate = SeatGate(taken_ttl_seconds=60)
+
+    # e.g. another worker held the advisory lock: not remembered, and the next request asks again
+    def lost_race():
+        raise HTTPException(status_code=409, detail="Seat is being reserved by another request")
+
+    with pytest.raises(HTTPException):
+        gate.run((1, "A1"), lost_race)
+    assert gate.run((1, "A1"), lambda: "reservation") == "reservation"
+
+    def taken():
+        raise SeatTaken()
+
+    with pytest.raises(SeatTaken):
+        gate.run((1, "B1"), taken)
+    with pytest.raises(HTTPException) as exc:
+        gate.run((1, "B1"), lambda: pytest.fail("should not reach the database"))
+    assert exc.value.status_code == 409
+
+def test_waiters_recheck_after_a_lost_race():
+    gate = SeatGate()
+    calls = []
+
+    def hold():
+        calls.append(1)
+        time.sleep(0.1)
+        if len(calls) == 1:
+            raise HTTPException(status_code=409, detail="Seat is being reserved by another request")
+        return "reservation"
+
+    results, statuses = contend(gate, (1, "C1"), hold, contenders=5)
+    # the first leader's lost race is not handed on: a waiter takes over and wins the seat
+    assert results == ["reservation"]
+    assert statuses == [409] * 4
+    assert len(calls) == 2
+
+def test_advisory_mode_refuses_seat_locked_by_another_process(client, db_session):
+    user = make_user(client, name="Kai", email="kai@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Premiere", headers=headers)
+    add_seats(client, show["id"], ["P1"], headers=headers)
+
+    # another worker's leader is mid-hold on P1
+    with get_engine().connect() as other:
+        with other.begin():
+            assert try_lock_seat(other, show["id"], "P1")
+
+            store = SqlReservationStore(db_session, gate=SeatGate(), advisory_locks=True)
+            with pytest.raises(HTTPException) as exc:
+                store.hold(user_id=user["id"], show_id=show["id"], seat_label="p1", hold_minutes=5)
+            assert exc.value.status_code == 409
+
+    reservation = store.hold(user_id=user["id"], show_id=show["id"], seat_label="P1", hold_minutes=5)
+    assert reservation.status == "HELD"
+
+def test_expiry_sweep_frees_a_remembered_seat(client, db_session):
+    assert get_seat_gate().taken_ttl_seconds > 0  # on by default
+    user = make_user(client, name="Ivo", email="ivo@example.com")
+    headers = login(client, email=user["email"], pwd="secret123")
+    show = make_show(client, title="Sweep", headers=headers)
+    add_seats(client, show["id"], ["S1"], headers=headers)
+
+    held = hold(client, show_id=show["id"], seat_label="S1", headers=headers).json()
+    assert hold(client, show_id=show["id"], seat_label="S1", headers=headers).status_code == 409
+
+    # force the hold into the past and sweep it
+    now_db = db_session.scalar(select(func.now()))
+    db_session.query(Reservation).filter(Reservation.id == held["id"]).update({Reservation.hold_expiry: now_db})
+    db_session.commit()
+
+    assert [row.id for row in expire_stale_holds(db_session)] == [held["id"]]
+    assert hold(client, show_id=show["id"], seat_label="S1", headers=headers).status_code == 200
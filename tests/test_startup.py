@@ -0,0 +1,105 @@
+"""
+App factory, lazy initialization and startup warm-up.
+"""
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+import main
+from app.config import configure_settings, get_settings, settings
+from app.warmup import upcoming_show_ids, warm_pool
+from app.database import get_engine
+from app.replica import get_replica_sessionmaker
+from app.models import Show
+from main import create_app
+from conftest import db_session
+
+def test_importing_the_app_reads_no_settings_and_opens_no_engine():
+    probe = (
+        "import main, app.config, app.database;"
+        "assert app.config._settings is None;"
+        "assert app.database.get_engine.cache_info().currsize == 0"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+def test_readiness_flips_once_warm():
+    original = get_settings()
+    app = create_app(original.model_copy(update={"WARMUP_POOL_CONNECTIONS": 2}))
+    try:
+        with TestClient(app) as client:
+            deadline = time.monotonic() + 10
+            resp = client.get("/health/ready")
+            while resp.status_code == 503 and time.monotonic() < deadline:
+                time.sleep(0.05)
+                resp = client.get("/health/ready")
+            assert resp.status_code == 200
+            assert resp.json()["warmup"]["connections"] == 2
+    finally:
+        configure_settings(original)
+
+def test_reconfiguring_closes_the_previous_pools():
+    original = get_settings()
+    # the primary doubles as the replica; only the pools matter here
+    primary_url = get_engine().url.render_as_string(hide_password=False)
+    configure_settings(original.model_copy(update={"DATABASE_REPLICA_URL": primary_url}))
+    try:
+        engine = get_engine()
+        replica_engine = get_replica_sessionmaker().kw["bind"]
+        for pooled in (engine, replica_engine):
+            warm_pool(pooled, 2)
+            assert pooled.pool.checkedin() == 2
+    finally:
+        configure_settings(original)
+
+    assert get_engine() is not engine
+    assert engine.pool.checkedin() == 0
+    assert replica_engine.pool.checkedin() == 0
+
+def test_failed_warm_up_keeps_the_worker_unready_until_a_retry_succeeds(monkeypatch):
+    attempts = []
+
+    def flaky_warm_up():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("database is starting up")
+        return {"connections": 0, "shows": 0, "seconds": 0.0}
+
+    monkeypatch.setattr(main, "warm_up", flaky_warm_up)
+    monkeypatch.setattr(settings, "WARMUP_RETRY_SECONDS", 0.2)
+    with TestClient(create_app()) as client:
+        errors = set()
+        deadline = time.monotonic() + 10
+        resp = client.get("/health/ready")
+        while resp.status_code == 503 and time.monotonic() < deadline:
+            errors.add(resp.json()["warmup_error"])
+            time.sleep(0.05)
+            resp = client.get("/health/ready")
+        assert resp.status_code == 200
+        assert len(attempts) == 3
+        # not ready in between, with the failure reported
+        assert "RuntimeError: database is starting up" in errors
+
+def test_unstarted_app_is_not_ready():
+    app = create_app()
+    assert app.state.ready is False
+
+def test_warm_pool_leaves_connections_in_the_pool():
+    engine = get_engine()
+    warm_pool(engine, 3)
+    assert engine.pool.checkedin() >= 3
+
+def test_upcoming_shows_are_limited_to_the_window(db_session):
+    now = datetime.now(timezone.utc)
+    soon = Show(title="Tonight", venue="Arena", starts_at=now + timedelta(hours=2))
+    later = Show(title="Next Month", venue="Arena", starts_at=now + timedelta(days=30))
+    past = Show(title="Yesterday", venue="Arena", starts_at=now - timedelta(days=1))
+    db_session.add_all([soon, later, past])
+    db_session.flush()
+
+    show_ids = upcoming_show_ids(db_session, timedelta(hours=24), limit=100)
+    assert soon.id in show_ids
+    assert later.id not in show_ids and past.id not in show_ids
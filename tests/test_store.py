@@ -0,0 +1,80 @@
+"""
+Domain logic tests against the in-memory store (no database needed).
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.store import InMemoryReservationStore
+
+def make_store(clock=None):
+    store = InMemoryReservationStore(stripes=4, clock=clock)
+    assert store.add_show("Test Night", "Hall", datetime(2030, 1, 1, tzinfo=timezone.utc)).id == 1
+    store.add_seats(1, ["A1", "A2", " b1 "])
+    return store
+
+def test_add_seats_normalizes_and_rejects_duplicates():
+    store = make_store()
+    assert [seat["seat_number"] for seat in store.list_seats(1)] == ["A1", "A2", "B1"]
+
+    with pytest.raises(HTTPException) as exc:
+        store.add_seats(1, ["a1"])
+    assert exc.value.status_code == 409
+
+    with pytest.raises(HTTPException) as exc:
+        store.add_seats(1, ["C1", "c1"])
+    assert exc.value.status_code == 400
+
+def test_one_active_reservation_per_seat():
+    store = make_store()
+    first = store.hold(user_id=1, show_id=1, seat_label="a1", hold_minutes=5)
+    assert first.status == "HELD"
+
+    with pytest.raises(HTTPException) as exc:
+        store.hold(user_id=2, show_id=1, seat_label="A1", hold_minutes=5)
+    assert exc.value.status_code == 409
+
+    # releasing frees the seat, and release is idempotent
+    assert store.release(first.id).status == "CANCELLED"
+    assert store.release(first.id).status == "CANCELLED"
+    assert store.hold(user_id=2, show_id=1, seat_label="A1", hold_minutes=5).status == "HELD"
+
+def test_confirm_is_idempotent_and_expires_stale_holds():
+    now = [datetime(2030, 1, 1, tzinfo=timezone.utc)]
+    store = make_store(clock=lambda: now[0])
+
+    held = store.hold(user_id=1, show_id=1, seat_label="A1", hold_minutes=5)
+    assert store.confirm(held.id).status == "CONFIRMED"
+    assert store.confirm(held.id).status == "CONFIRMED"
+
+    stale = store.hold(user_id=1, show_id=1, seat_label="A2", hold_minutes=5)
+    now[0] += timedelta(minutes=5)
+    with pytest.raises(HTTPException) as exc:
+        store.confirm(stale.id)
+    assert exc.value.status_code == 400
+    assert stale.status == "EXPIRED"
+
+    statuses = {seat["seat_number"]: seat["status"] for seat in store.availability(1)}
+    assert statuses == {"A1": "CONFIRMED", "A2": "AVAILABLE", "B1": "AVAILABLE"}
+
+def test_concurrent_holds_have_a_single_winner():
+    store = make_store()
+    results = []
+
+    def contend(user_id):
+        try:
+            store.hold(user_id=user_id, show_id=1, seat_label="B1", hold_minutes=5)
+            results.append("held")
+        except HTTPException as exc:
+            results.append(exc.status_code)
+
+    threads = [threading.Thread(target=contend, args=(i,)) for i in range(32)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count("held") == 1
+    assert results.count(409) == 31